@@ -0,0 +1,57 @@
+import pygame
+
+from code.settings import ACTIVITY_MARGIN, HEIGHT, TILE_SIZE, WIDTH, monster_data
+from code.spatial import SpatialGrid
+
+
+class ActivitySystem:
+    def __init__(self, listeners, margin=ACTIVITY_MARGIN):
+        self.listeners = listeners
+        self.margin = margin
+
+        # the active area covers the screen and the largest notice radius around the player
+        notice_radius = max(info['notice_radius'] for info in monster_data.values())
+        self.active_rect = pygame.Rect(
+            0, 0, (max(WIDTH // 2, notice_radius) + margin) * 2, (max(HEIGHT // 2, notice_radius) + margin) * 2
+        )
+
+        self.awake = {}
+        self.sleeping = SpatialGrid(TILE_SIZE * 4, 'rect')
+
+    def add(self, sprite):
+        self.awake[sprite] = None
+        return self
+
+    def remove(self, sprite):
+        self.awake.pop(sprite, None)
+        self.sleeping.remove(sprite)
+        return self
+
+    def sleep(self, sprite):
+        del self.awake[sprite]
+        self.sleeping.add(sprite)
+        for listener in self.listeners:
+            listener.sleep(sprite)
+        return self
+
+    def wake(self, sprite):
+        if sprite in self.sleeping:
+            self.sleeping.remove(sprite)
+            self.awake[sprite] = None
+            for listener in self.listeners:
+                listener.wake(sprite)
+        return self
+
+    def update(self, center):
+        self.active_rect.center = center
+        for sprite in self.sleeping.collide(self.active_rect):
+            self.wake(sprite)
+
+        # sprites are only put to sleep a margin further away, so they do not flip on the border
+        sleep_rect = self.active_rect.inflate(self.margin * 2, self.margin * 2)
+        for sprite in list(self.awake):
+            if not sprite.alive():
+                del self.awake[sprite]
+            elif not sprite.rect.colliderect(sleep_rect):
+                self.sleep(sprite)
+        return self
@@ -0,0 +1,82 @@
+# encoding=utf-8
+
+"""
+Depth sort benchmark
+Compares the old full sorted() per frame with the incremental depth indexes.
+
+Run from the code folder:
+    python -m benchmarks.depth_sort
+"""
+
+from heapq import merge
+from random import randint, seed
+from time import perf_counter
+
+import pygame
+
+from code.depth import DynamicDepthIndex, StaticDepthIndex
+from code.settings import HEIGHT, TILE_SIZE, WIDTH
+
+SPRITE_COUNTS = (1000, 5000, 20000, 50000)
+DYNAMIC_RATIO = 0.02
+FRAMES = 30
+
+
+class BenchSprite:
+    def __init__(self, x, y, height=TILE_SIZE):
+        self.rect = pygame.Rect(x, y, TILE_SIZE, height)
+
+
+def create_sprites(count):
+    # square map with a tile density close to the stock map
+    side = int((count * 4) ** 0.5) * TILE_SIZE
+    static = [BenchSprite(randint(0, side), randint(0, side), TILE_SIZE * randint(1, 2)) for _ in range(count)]
+    dynamic = [BenchSprite(randint(0, side), randint(0, side)) for _ in range(max(1, int(count * DYNAMIC_RATIO)))]
+    return side, static, dynamic
+
+
+def move(dynamic):
+    for sprite in dynamic:
+        sprite.rect.y += randint(-2, 2)
+
+
+def full_sort(static, dynamic, camera):
+    sprites = static + dynamic
+    start = perf_counter()
+    for _ in range(FRAMES):
+        move(dynamic)
+        for sprite in sorted(sprites, key=lambda spt: spt.rect.centery):
+            sprite.rect.colliderect(camera)
+    return (perf_counter() - start) / FRAMES
+
+
+def incremental(static, dynamic, camera):
+    static_index = StaticDepthIndex()
+    dynamic_index = DynamicDepthIndex()
+    for order, sprite in enumerate(static):
+        static_index.add(sprite, order)
+    for order, sprite in enumerate(dynamic, len(static)):
+        dynamic_index.add(sprite, order)
+
+    start = perf_counter()
+    for _ in range(FRAMES):
+        move(dynamic)
+        dynamic_index.refresh()
+        for _ in merge(static_index.query(camera), dynamic_index.query(camera)):
+            pass
+    return (perf_counter() - start) / FRAMES
+
+
+def run():
+    seed(0)
+    print(f'{"sprites":>10} {"sorted() ms":>14} {"incremental ms":>16} {"speedup":>10}')
+    for count in SPRITE_COUNTS:
+        side, static, dynamic = create_sprites(count)
+        camera = pygame.Rect(side // 2, side // 2, WIDTH, HEIGHT)
+        old = full_sort(static, dynamic, camera)
+        new = incremental(static, dynamic, camera)
+        print(f'{count:>10} {old * 1000:>14.3f} {new * 1000:>16.3f} {old / new:>9.1f}x')
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,85 @@
+# encoding=utf-8
+
+"""
+Draw Order Check
+Drives the scenarios headless and compares every frame drawn by YSortCameraGroup.custom_draw, with its baked
+chunks, culling and tile redraws, against a brute force render of the floor and every sprite sorted by centery.
+Frames between two ticks are checked too, with the sprites at their interpolated positions.
+
+Run from the code folder:
+    python -m benchmarks.draw_order
+    python -m benchmarks.draw_order grass_cutting --frames 200
+"""
+
+import random
+import sys
+from argparse import ArgumentParser
+
+import pygame
+
+from code.benchmarks.scenarios import SCENARIOS
+from code.headless import HeadlessGame
+from code.settings import WATER_COLOR
+
+ALPHAS = (1.0, 0.5)
+
+
+def brute_force_draw(camera, surface, alpha):
+    # (centery, order, sprite) for everything the camera draws, the order breaks ties like the camera does
+    entries = [(sprite.rect.centery, order, sprite) for sprite, (_, order, _) in camera.static_sprites.entries.items()]
+    entries += [(sprite.rect.centery, order, sprite) for sprite, order in camera.dynamic_sprites.orders.items()]
+    entries += camera.particles.query(pygame.Rect(camera.floor_rect))
+
+    surface.fill(WATER_COLOR)
+    surface.blit(camera.floor_surf, camera.floor_rect.topleft - camera.offset)
+    for _, _, sprite in sorted(entries, key=lambda entry: entry[:2]):
+        pos = sprite.rect.topleft if sprite in camera.static_sprites.entries else camera.render_pos(sprite, alpha)
+        surface.blit(sprite.image, (pos[0] - camera.offset.x, pos[1] - camera.offset.y))
+
+
+def check_scenario(scenario, frames):
+    random.seed(0)
+    game = HeadlessGame(scenario.input_source(), level_data=scenario.level_data(), dummy_display=True)
+    level = game.level
+    camera = level.visible_sprites
+    surface = game.surface
+    reference = pygame.Surface(surface.get_size(), 0, surface)
+    scenario.setup(level)
+
+    mismatches = []
+    for frame in range(frames):
+        scenario.before_frame(level, frame)
+        game.step()
+        for alpha in ALPHAS:
+            surface.fill(WATER_COLOR)
+            camera.custom_draw(level.player, alpha)
+            brute_force_draw(camera, reference, alpha)
+            if pygame.image.tobytes(surface, 'RGB') != pygame.image.tobytes(reference, 'RGB'):
+                mask = pygame.mask.from_threshold(surface, (0, 0, 0), (1, 1, 1, 255), reference, 1)
+                mismatches.append((frame, alpha, mask.get_size()[0] * mask.get_size()[1] - mask.count()))
+    return mismatches
+
+
+def main():
+    parser = ArgumentParser(description='Compare the camera draw with a brute force sorted draw.')
+    parser.add_argument('scenarios', nargs='*', help=f'scenarios to check, all by default ({", ".join(SCENARIOS)})')
+    parser.add_argument('--frames', type=int, help='frames per scenario, overrides the scenario default')
+    args = parser.parse_args()
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f'unknown scenarios: {", ".join(sorted(unknown))}')
+
+    failed = False
+    for name in args.scenarios or SCENARIOS.keys():
+        scenario = SCENARIOS[name]()
+        frames = args.frames or scenario.frames
+        mismatches = check_scenario(scenario, frames)
+        print(f'{name:<16} {len(mismatches)} mismatching frames of {frames * len(ALPHAS)}')
+        for frame, alpha, pixels in mismatches[:5]:
+            print(f'  frame {frame} alpha {alpha}: {pixels} pixels differ')
+        failed = failed or bool(mismatches)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
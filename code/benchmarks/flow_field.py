@@ -0,0 +1,79 @@
+# encoding=utf-8
+
+"""
+Flow field benchmark
+Cost of recomputing the field when the player reaches a new tile, by field radius and map size,
+and cost of the per-frame direction lookup by enemy count.
+
+Run from the code folder:
+    python -m benchmarks.flow_field
+"""
+
+from random import choice, seed, uniform
+from time import perf_counter
+
+import numpy as np
+
+from code.benchmarks.scenarios import tile_level
+from code.flow_field import FlowField
+from code.settings import FLOW_FIELD_RADIUS, TILE_SIZE
+from code.support import ImportLevel
+
+RADII = (8, FLOW_FIELD_RADIUS, 16, 24)
+ENEMY_COUNTS = (10, 100, 1000, 10000)
+MAP_SCALES = ((1, 1), (5, 2), (10, 10))
+UPDATES = 200
+LOOKUPS = 1000
+
+
+def free_tiles(level_data):
+    layout = level_data['FloorBlocks']
+    return [(col, row) for row in range(level_data.rows) for col in range(level_data.cols) if layout[row][col] == -1]
+
+
+def recompute(level_data, tiles, radius):
+    flow_field = FlowField(level_data, radius=radius)
+    start = perf_counter()
+    for _ in range(UPDATES):
+        col, row = choice(tiles)
+        flow_field.update((col * TILE_SIZE, row * TILE_SIZE))
+    return (perf_counter() - start) / UPDATES
+
+
+def lookup(level_data, tiles, count):
+    flow_field = FlowField(level_data)
+    col, row = choice(tiles)
+    flow_field.update((col * TILE_SIZE, row * TILE_SIZE))
+    spread = FLOW_FIELD_RADIUS * TILE_SIZE
+    positions = np.array([
+        (col * TILE_SIZE + uniform(-spread, spread), row * TILE_SIZE + uniform(-spread, spread)) for _ in range(count)
+    ])
+
+    start = perf_counter()
+    for _ in range(LOOKUPS):
+        flow_field.lookup(positions)
+    return (perf_counter() - start) / LOOKUPS
+
+
+def run():
+    seed(0)
+    level_data = ImportLevel.load()
+    tiles = free_tiles(level_data)
+
+    print(f'{"radius":>10} {"recompute ms":>14}')
+    for radius in RADII:
+        print(f'{radius:>10} {recompute(level_data, tiles, radius) * 1000:>14.3f}')
+
+    print(f'\n{"map":>10} {"recompute ms":>14}')
+    for scale in MAP_SCALES:
+        scaled = tile_level(level_data, *scale)
+        label = f'{scale[0]}x{scale[1]}'
+        print(f'{label:>10} {recompute(scaled, free_tiles(scaled), FLOW_FIELD_RADIUS) * 1000:>14.3f}')
+
+    print(f'\n{"enemies":>10} {"lookup ms":>14}')
+    for count in ENEMY_COUNTS:
+        print(f'{count:>10} {lookup(level_data, tiles, count) * 1000:>14.3f}')
+
+
+if __name__ == '__main__':
+    run()
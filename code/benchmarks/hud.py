@@ -0,0 +1,106 @@
+# encoding=utf-8
+
+"""
+HUD benchmark
+Compares the old immediate mode HUD, drawn from scratch every frame, with the cached widgets of PlayerUiData.
+
+Run from the code folder:
+    python -m benchmarks.hud
+"""
+
+import os
+from time import perf_counter
+
+import pygame
+
+from code.player_ui_data import PlayerUiData
+from code.settings import HEIGHT, UI_BG_COLOR, UI_BORDER_COLOR, UI_BORDER_COLOR_ACTIVE, TEXT_COLOR, WIDTH, \
+    HEALTH_COLOR, ENERGY_COLOR, ITEM_BOX_SIZE
+
+FRAMES = 3000
+
+
+class BenchPlayer:
+    def __init__(self):
+        self.stats = {'health': 100, 'energy': 60}
+        self.health = 100
+        self.energy = 10
+        self.exp = 500
+        self.weapon_index = 0
+        self.magic_index = 0
+        self.can_switch_weapon = True
+        self.can_switch_magic = True
+
+    def update(self, frame):
+        # energy regenerates a little every frame, the rest changes now and then
+        self.energy = min(self.energy + 0.04, self.stats['energy'])
+        if frame % 60 == 0:
+            self.health = max(self.health - 5, 0)
+            self.exp += 110
+        if frame % 240 == 0:
+            self.weapon_index = (self.weapon_index + 1) % 5
+            self.can_switch_weapon = not self.can_switch_weapon
+
+
+class ImmediateHud:
+    # the HUD as it was drawn before the widget cache
+    def __init__(self, ui):
+        self.ui = ui
+        self.display_surface = ui.display_surface
+
+    def show_bar(self, current, max_amount, bg_rect, color):
+        pygame.draw.rect(self.display_surface, UI_BG_COLOR, bg_rect)
+        current_rect = bg_rect.copy()
+        current_rect.width = bg_rect.width * current / max_amount
+        pygame.draw.rect(self.display_surface, color, current_rect)
+        pygame.draw.rect(self.display_surface, UI_BORDER_COLOR, bg_rect, 3)
+
+    def show_exp(self, exp):
+        text_surf = self.ui.font.render(str(int(exp)), False, TEXT_COLOR)
+        text_rect = text_surf.get_rect(bottomright=(WIDTH - 20, HEIGHT - 20))
+        pygame.draw.rect(self.display_surface, UI_BG_COLOR, text_rect.inflate(20, 20))
+        self.display_surface.blit(text_surf, text_rect)
+        pygame.draw.rect(self.display_surface, UI_BORDER_COLOR, text_rect.inflate(20, 20), 3)
+
+    def item_overlay(self, graphic, left, top, has_switched):
+        bg_rect = pygame.Rect(left, top, ITEM_BOX_SIZE, ITEM_BOX_SIZE)
+        pygame.draw.rect(self.display_surface, UI_BG_COLOR, bg_rect)
+        border_color = UI_BORDER_COLOR_ACTIVE if has_switched else UI_BORDER_COLOR
+        pygame.draw.rect(self.display_surface, border_color, bg_rect, 3)
+        self.display_surface.blit(graphic, graphic.get_rect(center=bg_rect.center))
+
+    def display(self, player):
+        self.show_bar(player.health, player.stats['health'], self.ui.health_bar_rect, HEALTH_COLOR)
+        self.show_bar(player.energy, player.stats['energy'], self.ui.energy_bar_rect, ENERGY_COLOR)
+        self.show_exp(player.exp)
+        self.item_overlay(self.ui.weapon_graphics[player.weapon_index], 10, 630, not player.can_switch_weapon)
+        self.item_overlay(self.ui.magic_graphics[player.magic_index], 80, 635, not player.can_switch_magic)
+
+
+def measure(hud):
+    player = BenchPlayer()
+    start = perf_counter()
+    for frame in range(FRAMES):
+        player.update(frame)
+        hud.display(player)
+    return (perf_counter() - start) / FRAMES
+
+
+def run():
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    pygame.init()
+    pygame.display.set_mode((WIDTH, HEIGHT))
+
+    ui = PlayerUiData()
+    old = measure(ImmediateHud(ui))
+    new = measure(ui)
+    renders = sum(widget.render_count for widget in ui.widgets)
+
+    print(f'{"hud":>10} {"ms/frame":>10}')
+    print(f'{"before":>10} {old * 1000:>10.4f}')
+    print(f'{"after":>10} {new * 1000:>10.4f}')
+    print(f'{old / new:.1f}x faster, {renders} widget renders in {FRAMES} frames')
+
+
+if __name__ == '__main__':
+    run()
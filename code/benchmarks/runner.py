@@ -0,0 +1,150 @@
+# encoding=utf-8
+
+"""
+Scenario Benchmark Runner
+Drives the Level headless for a fixed number of frames per scenario and reports
+frame time percentiles with a per-subsystem breakdown.
+
+Run from the code folder:
+    python -m benchmarks.runner
+    python -m benchmarks.runner --output results.json --baseline baseline.json
+"""
+
+import json
+import random
+import sys
+from argparse import ArgumentParser
+from time import perf_counter
+
+from code.benchmarks.scenarios import SCENARIOS
+from code.headless import HeadlessGame
+
+# (report name, owner attribute on the level, method name)
+# collision runs inside visible_sprites.update, every entity move queries the obstacle grid
+SUBSYSTEMS = (
+    ('custom_draw', 'visible_sprites', 'custom_draw'),
+    ('streaming', 'world', 'update'),
+    ('visible_sprites.update', 'visible_sprites', 'update'),
+    ('collision', 'obstacle_grid', 'collide'),
+    ('enemy_update', 'enemy_manager', 'update'),
+    ('player_attack_logic', None, 'player_attack_logic'),
+    ('ui.display', 'ui', 'display'),
+)
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class SubsystemTimer:
+    def __init__(self, level):
+        self.totals = {name: 0.0 for name, _, _ in SUBSYSTEMS}
+        self.frames = {name: [] for name, _, _ in SUBSYSTEMS}
+
+        # every subsystem method is wrapped on its instance, the classes are left alone
+        for name, owner, method in SUBSYSTEMS:
+            target = getattr(level, owner) if owner else level
+            setattr(target, method, self.timed(name, getattr(target, method)))
+
+    def timed(self, name, function):
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            result = function(*args, **kwargs)
+            self.totals[name] += perf_counter() - start
+            return result
+        return wrapper
+
+    def end_frame(self, record):
+        for name in self.totals:
+            if record:
+                self.frames[name].append(self.totals[name] * 1000)
+            self.totals[name] = 0.0
+
+
+def run_scenario(scenario, frames=None, warmup=30):
+    random.seed(0)
+    game = HeadlessGame(scenario.input_source(), render=True, level_data=scenario.level_data(), dummy_display=True)
+    level = game.level
+    scenario.setup(level)
+    timer = SubsystemTimer(level)
+
+    frame_times = []
+    total = frames or scenario.frames
+    for frame in range(warmup + total):
+        scenario.before_frame(level, frame)
+        start = perf_counter()
+        game.step()
+        if frame >= warmup:
+            frame_times.append((perf_counter() - start) * 1000)
+        timer.end_frame(frame >= warmup)
+
+    result = {'frames': len(frame_times), 'description': scenario.description}
+    result.update({f'p{value}': percentile(frame_times, value) for value in PERCENTILES})
+    result['mean'] = sum(frame_times) / len(frame_times)
+    result['subsystems'] = {
+        name: {'mean': sum(times) / len(times), 'p95': percentile(times, 95)}
+        for name, times in timer.frames.items()
+    }
+    result['pools'] = level.pool_stats
+    return result
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        for key in ('p50', 'p95'):
+            limit = baseline[name][key] * (1 + tolerance)
+            if result[key] > limit:
+                regressions.append(f'{name} {key}: {result[key]:.3f} ms > {limit:.3f} ms (baseline {baseline[name][key]:.3f} ms)')
+    return regressions
+
+
+def print_result(name, result):
+    print(f'\n{name}: {result["description"]}')
+    print(f'  frame ms  p50 {result["p50"]:7.3f}  p95 {result["p95"]:7.3f}  p99 {result["p99"]:7.3f}  mean {result["mean"]:7.3f}')
+    for subsystem, times in result['subsystems'].items():
+        print(f'  {subsystem:<24} mean {times["mean"]:7.3f}  p95 {times["p95"]:7.3f}')
+    for pool, stats in result['pools'].items():
+        print(f'  {pool + " pool":<24} size {stats["size"]:7}  high water {stats["high_water"]:7}')
+
+
+def main():
+    parser = ArgumentParser(description='Run the benchmark scenarios.')
+    parser.add_argument('scenarios', nargs='*', help=f'scenarios to run, all by default ({", ".join(SCENARIOS)})')
+    parser.add_argument('--frames', type=int, help='frames per scenario, overrides the scenario default')
+    parser.add_argument('--warmup', type=int, default=30, help='frames run before measuring')
+    parser.add_argument('--output', help='write the results to this json file')
+    parser.add_argument('--baseline', help='compare against a saved results file and fail on regressions')
+    parser.add_argument('--tolerance', type=float, default=0.15, help='allowed slowdown against the baseline')
+    args = parser.parse_args()
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f'unknown scenarios: {", ".join(sorted(unknown))}')
+
+    results = {}
+    for name in args.scenarios or SCENARIOS.keys():
+        results[name] = run_scenario(SCENARIOS[name](), args.frames, args.warmup)
+        print_result(name, results[name])
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.tolerance)
+        if regressions:
+            print('\nPERFORMANCE REGRESSION', *regressions, sep='\n  ')
+            sys.exit(1)
+        print('\nno regressions against the baseline')
+
+
+if __name__ == '__main__':
+    main()
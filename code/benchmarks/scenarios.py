@@ -0,0 +1,124 @@
+# encoding=utf-8
+
+"""
+Benchmark Scenarios
+Each scenario prepares a Level and drives it frame by frame.
+"""
+
+from math import cos, pi, sin
+from random import choice, uniform
+
+import pygame
+
+from code.controls import ScriptedInput
+from code.enemy import EnemyType
+from code.settings import TILE_SIZE
+from code.support import ImportLevel, LevelData
+
+
+class Scenario:
+    name = ''
+    description = ''
+    frames = 600
+    map_scale = (1, 1)
+
+    def input_source(self):
+        return ScriptedInput()
+
+    def level_data(self):
+        level_data = ImportLevel.load()
+        if self.map_scale == (1, 1):
+            return level_data
+        return tile_level(level_data, *self.map_scale)
+
+    def setup(self, level):
+        pass
+
+    def before_frame(self, level, frame):
+        pass
+
+
+class Idle(Scenario):
+    name = 'idle'
+    description = 'player standing still on the stock map'
+
+
+class Chase(Scenario):
+    name = 'chase_200'
+    description = '200 extra enemies spawned around the player, all inside their notice radius'
+    enemy_count = 200
+
+    def setup(self, level):
+        center = pygame.math.Vector2(level.player.rect.center)
+        for _ in range(self.enemy_count):
+            angle = uniform(0, 2 * pi)
+            distance = uniform(TILE_SIZE * 2, TILE_SIZE * 5)
+            pos = center + pygame.math.Vector2(cos(angle), sin(angle)) * distance
+            level.create_enemy((int(pos.x), int(pos.y)), choice(list(EnemyType)))
+
+    def before_frame(self, level, frame):
+        # keep the player alive and in place so every enemy keeps chasing
+        level.player.health = level.player.stats['health']
+
+
+class GrassCutting(Scenario):
+    name = 'grass_cutting'
+    description = 'the player jumps next to a grass tile and swings the weapon, over and over'
+
+    def input_source(self):
+        return ScriptedInput([(1, {pygame.K_SPACE}), (1, ())], loop=True)
+
+    def before_frame(self, level, frame):
+        if frame % 30 == 0:
+            grass = [sprite for sprite in level.attackable_sprites if getattr(sprite, 'sprite_type', '') == 'grass']
+            if grass:
+                target = choice(grass)
+                level.player.hit_box.midtop = target.rect.midbottom
+                level.player.rect.center = level.player.hit_box.center
+                level.player.status.up()
+
+
+class FlameSpam(Scenario):
+    name = 'flame_spam'
+    description = 'flame spell cast as fast as the cooldown allows while walking around'
+
+    def input_source(self):
+        return ScriptedInput([
+            (60, {pygame.K_LCTRL, pygame.K_RIGHT}), (60, {pygame.K_LCTRL, pygame.K_DOWN}),
+            (60, {pygame.K_LCTRL, pygame.K_LEFT}), (60, {pygame.K_LCTRL, pygame.K_UP}),
+        ], loop=True)
+
+    def before_frame(self, level, frame):
+        level.player.energy = level.player.stats['energy']
+
+
+class LargeMap(Scenario):
+    name = 'large_map'
+    description = 'the stock map tiled 5x2 (10x the area), player walking in a loop'
+    map_scale = (5, 2)
+
+    def input_source(self):
+        return ScriptedInput([
+            (90, {pygame.K_RIGHT}), (90, {pygame.K_DOWN}), (90, {pygame.K_LEFT}), (90, {pygame.K_UP}),
+        ], loop=True)
+
+
+def tile_level(level_data, times_x, times_y):
+    layers = {}
+    for name, rows in level_data.layers.items():
+        tiled = []
+        for copy_y in range(times_y):
+            for row in rows:
+                tiled_row = []
+                for copy_x in range(times_x):
+                    cells = list(row)
+                    # only the first copy keeps the player spawn
+                    if name == 'Entities' and (copy_x or copy_y):
+                        cells = [-1 if cell == 394 else cell for cell in cells]
+                    tiled_row.extend(cells)
+                tiled.append(tiled_row)
+        layers[name] = tiled
+    return LevelData(layers, level_data.rows * times_y, level_data.cols * times_x)
+
+
+SCENARIOS = {scenario.name: scenario for scenario in (Idle, Chase, GrassCutting, FlameSpam, LargeMap)}
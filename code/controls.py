@@ -0,0 +1,47 @@
+import pygame
+
+
+class KeyboardInput:
+
+    @staticmethod
+    def get_pressed():
+        return pygame.key.get_pressed()
+
+    def advance(self):
+        return self
+
+
+class ScriptedKeys:
+    def __init__(self, pressed):
+        self.pressed = pressed
+
+    def __getitem__(self, key):
+        return key in self.pressed
+
+
+class ScriptedInput:
+    def __init__(self, steps=(), loop=False):
+        # steps are (frames, keys) pairs, played one after the other
+        self.steps = [(frames, ScriptedKeys(frozenset(keys))) for frames, keys in steps]
+        self.loop = loop
+        self.step_index = 0
+        self.step_frame = 0
+        self.idle = ScriptedKeys(frozenset())
+
+    def get_pressed(self):
+        if self.step_index < len(self.steps):
+            return self.steps[self.step_index][1]
+        return self.idle
+
+    def advance(self):
+        if self.step_index < len(self.steps):
+            self.step_frame += 1
+            if self.step_frame >= self.steps[self.step_index][0]:
+                self.step_frame = 0
+                self.step_index += 1
+                if self.loop and self.step_index == len(self.steps):
+                    self.step_index = 0
+        return self
+
+
+keyboard = KeyboardInput()
@@ -1,12 +1,166 @@
+import json
+from collections import deque
+from time import perf_counter
+
 import pygame
 
-pygame.init()
-font = pygame.font.Font(None, 30)
+from code.support import text_cache
+
+font = None
+
+
+def get_font():
+    global font
+    if font is None:
+        pygame.font.init()
+        font = pygame.font.Font(None, 30)
+    return font
 
 
 def debug(info, y=10, x=10):
     display_surface = pygame.display.get_surface()
-    debug_surf = font.render(str(info), True, 'White')
+    debug_surf = text_cache.render(get_font(), str(info), True, 'White')
     debug_rect = debug_surf.get_rect(topleft=(x, y))
     pygame.draw.rect(display_surface, 'Black', debug_rect)
     display_surface.blit(debug_surf, debug_rect)
+
+
+class NullScope:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+class Scope:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.profiler.add_time(self.name, self.start, perf_counter())
+        return False
+
+
+class Profiler:
+    null_scope = NullScope()
+
+    def __init__(self, history=180, max_events=500000):
+        self.enabled = False
+        self.history_size = history
+        self.origin = perf_counter()
+
+        # current frame
+        self.frame_start = perf_counter()
+        self.times = {}
+        self.counters = {}
+        self.last_counters = {}
+
+        # rolling history for the overlay and the trace for export
+        self.history = {}
+        self.frame_times = deque(maxlen=history)
+        self.events = deque(maxlen=max_events)
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self.times.clear()
+        self.counters.clear()
+        self.frame_start = perf_counter()
+        return self
+
+    def scope(self, name):
+        # a disabled profiler hands back one shared no-op context manager
+        if not self.enabled:
+            return self.null_scope
+        return Scope(self, name)
+
+    def add_time(self, name, start, end):
+        self.times[name] = self.times.get(name, 0.0) + end - start
+        self.events.append({
+            'name': name, 'ph': 'X', 'pid': 0, 'tid': 0,
+            'ts': (start - self.origin) * 1e6, 'dur': (end - start) * 1e6
+        })
+
+    def count(self, name, value=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def set_counter(self, name, value):
+        if self.enabled:
+            self.counters[name] = value
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+
+        now = perf_counter()
+        self.frame_times.append((now - self.frame_start) * 1000)
+        for name in self.history.keys() | self.times.keys():
+            if name not in self.history:
+                self.history[name] = deque(maxlen=self.history_size)
+            self.history[name].append(self.times.get(name, 0.0) * 1000)
+
+        if self.counters:
+            self.events.append({
+                'name': 'counters', 'ph': 'C', 'pid': 0, 'tid': 0,
+                'ts': (now - self.origin) * 1e6, 'args': dict(self.counters)
+            })
+        self.frame_start = now
+        self.times.clear()
+        self.last_counters = self.counters
+        self.counters = {}
+
+    def export(self, path):
+        with open(path, 'w') as trace_file:
+            json.dump({'traceEvents': list(self.events), 'displayTimeUnit': 'ms'}, trace_file)
+        return path
+
+    def draw_graph(self, surface, values, rect, color, scale):
+        pygame.draw.rect(surface, (0, 0, 0), rect)
+        if len(values) > 1:
+            step = rect.width / (self.history_size - 1)
+            points = [
+                (rect.left + index * step, rect.bottom - min(value / scale, 1) * rect.height)
+                for index, value in enumerate(values)
+            ]
+            pygame.draw.lines(surface, color, False, points)
+        pygame.draw.rect(surface, (90, 90, 90), rect, 1)
+
+    def draw(self, surface):
+        if not self.enabled or not self.frame_times:
+            return
+
+        overlay_font = get_font()
+        left, top, width = surface.get_width() - 330, 80, 320
+        budget = 1000 / 60
+
+        # frame time graph, the full height is two 60 fps frames
+        lines = [f'frame {self.frame_times[-1]:6.2f} ms']
+        self.draw_graph(surface, self.frame_times, pygame.Rect(left, top, width, 60), (255, 255, 255), budget * 2)
+        top += 64
+
+        # one small graph per scope, slowest first
+        scopes = sorted(self.history.items(), key=lambda item: item[1][-1], reverse=True)
+        for name, values in scopes[:8]:
+            self.draw_graph(surface, values, pygame.Rect(left, top, width, 20), (255, 200, 0), budget)
+            label = overlay_font.render(f'{name} {values[-1]:.2f}', True, 'White')
+            surface.blit(label, (left + 4, top + 2))
+            top += 22
+
+        lines += [f'{name}: {value}' for name, value in self.last_counters.items()]
+        for line in lines:
+            label = overlay_font.render(line, True, 'White')
+            pygame.draw.rect(surface, 'Black', label.get_rect(topleft=(left, top)))
+            surface.blit(label, (left, top))
+            top += label.get_height()
+
+
+profiler = Profiler()
@@ -0,0 +1,99 @@
+from bisect import bisect_left, bisect_right, insort
+from heapq import merge
+
+from code.settings import TILE_SIZE
+
+
+class StaticDepthIndex:
+    def __init__(self, strip_width=TILE_SIZE * 8):
+        self.strip_width = strip_width
+
+        # vertical strips of the map, each one kept sorted by (centery, order, sprite)
+        self.strips = {}
+        self.entries = {}
+        self.max_half_height = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def strips_for(self, rect):
+        return range(rect.left // self.strip_width, (rect.right - 1) // self.strip_width + 1)
+
+    def add(self, sprite, order):
+        entry = (sprite.rect.centery, order, sprite)
+        self.entries[sprite] = entry
+        for strip in self.strips_for(sprite.rect):
+            insort(self.strips.setdefault(strip, []), entry)
+        self.max_half_height = max(self.max_half_height, sprite.rect.height // 2 + 1)
+        return self
+
+    def remove(self, sprite):
+        entry = self.entries.pop(sprite, None)
+        if entry:
+            for strip in self.strips_for(sprite.rect):
+                entries = self.strips[strip]
+                del entries[bisect_left(entries, entry)]
+        return self
+
+    def strip_entries(self, strip, rect, after):
+        entries = self.strips.get(strip)
+        if not entries:
+            return
+
+        # anything overlapping the rect has its centery inside this band
+        start = bisect_left(entries, (rect.top - self.max_half_height,))
+        if after:
+            start = max(start, bisect_right(entries, after))
+        end = bisect_left(entries, (rect.bottom + self.max_half_height + 1,))
+        for index in range(start, end):
+            entry = entries[index]
+            if entry[2].rect.colliderect(rect):
+                yield entry
+
+    def query(self, rect, after=None):
+        last = None
+        for entry in merge(*[self.strip_entries(strip, rect, after) for strip in self.strips_for(rect)]):
+            # sprites wider than a strip show up once per strip, always next to each other
+            if entry is not last:
+                last = entry
+                yield entry
+
+
+class DynamicDepthIndex:
+    def __init__(self):
+        self.orders = {}
+        self.entries = {}
+        self.sorted_entries = []
+
+    def __len__(self):
+        return len(self.orders)
+
+    def __iter__(self):
+        return iter(self.orders)
+
+    def add(self, sprite, order):
+        self.orders[sprite] = order
+        return self
+
+    def remove(self, sprite):
+        del self.orders[sprite]
+        entry = self.entries.pop(sprite, None)
+        if entry:
+            del self.sorted_entries[bisect_left(self.sorted_entries, entry)]
+        return self
+
+    def refresh(self):
+        # only sprites whose centery changed since the last frame are re-inserted
+        for sprite, order in self.orders.items():
+            entry = self.entries.get(sprite)
+            centery = sprite.rect.centery
+            if entry is None or entry[0] != centery:
+                if entry:
+                    del self.sorted_entries[bisect_left(self.sorted_entries, entry)]
+                entry = (centery, order, sprite)
+                self.entries[sprite] = entry
+                insort(self.sorted_entries, entry)
+        return self
+
+    def query(self, rect):
+        return [entry for entry in self.sorted_entries if entry[2].rect.colliderect(rect)]
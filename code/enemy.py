@@ -3,8 +3,8 @@ from enum import Enum
 
 import pygame.math
 
+from code.game_clock import game_clock
 from code.settings import monster_data
-from code.support import ImportFolder
 from entity import Entity
 
 
@@ -31,11 +31,11 @@ class EnemyStatus(Enum):
 
 class Enemy(Entity):
 
-    def __init__(self, pos, enemy_type, damage_player, trigger_death_particles, add_exp, groups):
+    def __init__(self, pos, enemy_type, damage_player, trigger_death_particles, add_exp, groups, obstacles=None):
         self.status = EnemyStatus.IDLE
         self.enemy_type = enemy_type
         filename = os.path.join(self.get_graphics_path(), '0.png')
-        super().__init__(pos, filename, groups)
+        super().__init__(pos, filename, groups, obstacles)
         self.import_graphics()
 
         # status
@@ -66,10 +66,9 @@ class Enemy(Entity):
         return os.path.normpath(f'../graphics/monsters/{self.enemy_type.name}/{self.status.name}')
 
     def import_graphics(self):
-        self.animations = {'idle': [], 'move': [], 'attack': []}
         for status in EnemyStatus:
             self.status = status
-            self.animations[status.name] = ImportFolder.load(self.get_graphics_path())
+            self.import_animation(status.name, self.get_graphics_path())
 
     def get_player_distance(self, player):
         enemy_vec = pygame.math.Vector2(self.rect.center)
@@ -81,28 +80,18 @@ class Enemy(Entity):
             direction = pygame.math.Vector2()
         return distance, direction
 
-    def get_status(self, player):
-        distance, _ = self.get_player_distance(player)
-        if distance <= self.attack_radius and self.can_attack:
-            if self.status != EnemyStatus.ATTACK:
-                self.index = 0
-            self.status = EnemyStatus.ATTACK
-        elif distance <= self.notice_radius:
-            self.status = EnemyStatus.MOVE
-        else:
-            self.status = EnemyStatus.IDLE
+    def set_status(self, status):
+        if status == EnemyStatus.ATTACK and self.status != EnemyStatus.ATTACK:
+            self.index = 0
+        self.status = status
         return self
 
-    def enemy_update(self, player):
-        self.get_status(player)
-        self.actions(player)
-
-    def actions(self, player):
+    def actions(self, direction):
         if self.status == EnemyStatus.ATTACK:
-            self.attack_time = pygame.time.get_ticks()
+            self.attack_time = game_clock.get_ticks()
             self.damage_player(self.damage, self.attack_type)
         elif self.status == EnemyStatus.MOVE:
-            _, self.direction = self.get_player_distance(player)
+            self.direction = pygame.math.Vector2(direction)
         else:
             self.direction = pygame.math.Vector2()
 
@@ -115,17 +104,11 @@ class Enemy(Entity):
                 self.can_attack = False
             self.index = 0
 
-        self.image = animation[int(self.index)]
+        self.image = self.frame(self.status.name, int(self.index))
         self.rect = self.image.get_rect(center=self.hit_box.center)
 
-        if not self.vulnerable:
-            alpha = self.wave_value()
-            self.image.set_alpha(alpha)
-        else:
-            self.image.set_alpha(255)
-
     def cool_downs(self):
-        current_time = pygame.time.get_ticks()
+        current_time = game_clock.get_ticks()
         if not self.can_attack:
             if current_time - self.attack_time >= self.attack_cooldown:
                 self.can_attack = True
@@ -142,7 +125,7 @@ class Enemy(Entity):
             else:
                 self.health -= player.get_full_magic_damage()
 
-            self.hit_time = pygame.time.get_ticks()
+            self.hit_time = game_clock.get_ticks()
             self.vulnerable = False
 
     def check_death(self):
@@ -0,0 +1,78 @@
+import numpy as np
+
+from code.enemy import EnemyStatus
+
+
+class EnemyManager:
+    statuses = (EnemyStatus.IDLE, EnemyStatus.MOVE, EnemyStatus.ATTACK)
+
+    def __init__(self, flow_field=None):
+        self.enemies = []
+        self.dirty = False
+        self.flow_field = flow_field
+
+        # one row per enemy, in the same order as self.enemies, rebuilt lazily after changes
+        self.positions = np.zeros((0, 2))
+        self.attack_radius = np.zeros(0)
+        self.notice_radius = np.zeros(0)
+
+    def __len__(self):
+        return len(self.enemies)
+
+    def add(self, enemy):
+        self.enemies.append(enemy)
+        self.dirty = True
+        return self
+
+    def sleep(self, enemy):
+        self.enemies.remove(enemy)
+        self.dirty = True
+        return self
+
+    def wake(self, enemy):
+        if enemy.alive():
+            self.add(enemy)
+        return self
+
+    def rebuild(self):
+        self.positions = np.zeros((len(self.enemies), 2))
+        self.attack_radius = np.array([enemy.attack_radius for enemy in self.enemies], dtype=float)
+        self.notice_radius = np.array([enemy.notice_radius for enemy in self.enemies], dtype=float)
+        self.dirty = False
+        return self
+
+    def remove_dead(self):
+        alive = [enemy for enemy in self.enemies if enemy.alive()]
+        if len(alive) != len(self.enemies):
+            self.enemies = alive
+            self.dirty = True
+        return self
+
+    def update(self, player):
+        self.remove_dead()
+        if not self.enemies:
+            return
+        if self.dirty:
+            self.rebuild()
+
+        # gather the current positions and attack state
+        self.positions[:] = [enemy.rect.center for enemy in self.enemies]
+        can_attack = np.fromiter((enemy.can_attack for enemy in self.enemies), dtype=bool, count=len(self.enemies))
+
+        # distances and directions to the player for every enemy at once
+        delta = np.asarray(player.rect.center, dtype=float) - self.positions
+        distance = np.hypot(delta[:, 0], delta[:, 1])
+        direction = np.divide(delta, distance[:, None], out=np.zeros_like(delta), where=distance[:, None] > 0)
+
+        # around walls the shared flow field gives the way to the player instead of the straight line
+        if self.flow_field:
+            self.flow_field.update(player.rect.center)
+            flow, valid = self.flow_field.lookup(self.positions)
+            direction = np.where(valid[:, None], flow, direction)
+
+        # 0 idle, 1 move, 2 attack
+        status = np.where(distance <= self.notice_radius, 1, 0)
+        status[(distance <= self.attack_radius) & can_attack] = 2
+
+        for enemy, code, enemy_direction in zip(self.enemies, status.tolist(), direction.tolist()):
+            enemy.set_status(self.statuses[code]).actions(enemy_direction)
@@ -1,62 +1,77 @@
-from math import sin
-
 import pygame
 
-from code.settings import TILE_SIZE
+from code.game_clock import game_clock
+from code.settings import FLICKER_ALPHA, TICK_SCALE, TILE_SIZE
+from code.support import ImportFolder, assets
 
 
 class Entity(pygame.sprite.Sprite):
-    def __init__(self, pos, filename, groups):
+    def __init__(self, pos, filename, groups, obstacles=None):
         super().__init__(*groups)
         self.pos = pos
         self.image = None
         self.rect = None
-        self.rect_undo = None
         self.hit_box = None
-        self.hit_box_undo = None
+        self.obstacles = obstacles
         self.set_image(filename)
 
         self.animations = {}
+        self.flicker_animations = {}
+        self.vulnerable = True
         self.index = 0
-        self.animation_speed = 0.15
+        self.animation_speed = 0.15 * TICK_SCALE
         self.direction = pygame.math.Vector2()
 
     def set_image(self, filename):
         if filename:
-            self.image = pygame.image.load(filename).convert_alpha()
+            self.image = assets.image(filename)
         else:
             self.image = pygame.Surface((TILE_SIZE, TILE_SIZE))
         self.rect = self.image.get_rect(topleft=self.pos)
-        self.rect_undo = self.rect.copy()
         self.hit_box = self.rect.inflate(-4, -26)
-        self.hit_box_undo = self.hit_box.copy()
         return self
 
-    def update_undo(self):
-        self.rect_undo = self.rect.copy()
-        self.hit_box_undo = self.hit_box.copy()
+    def import_animation(self, name, path):
+        # every frame has a faded twin for the hurt flicker, shared through the asset cache like the frame
+        self.animations[name] = ImportFolder.load(path)
+        self.flicker_animations[name] = ImportFolder.load(path, alpha=FLICKER_ALPHA)
         return self
 
-    def undo(self):
-        self.rect = self.rect_undo.copy()
-        self.hit_box = self.hit_box_undo.copy()
-        return self
+    def frame(self, name, index):
+        if self.vulnerable or game_clock.flicker:
+            return self.animations[name][index]
+        return self.flicker_animations[name][index]
 
     def move(self, speed):
-        if self.direction.magnitude() != 0:
-            self.direction = self.direction.normalize()
+        if self.direction.x == 0 and self.direction.y == 0:
+            return
+        self.direction.normalize_ip()
+
+        # speeds are tuned per base tick, a slower simulation covers more ground each tick
+        speed *= TICK_SCALE
 
+        # one axis at a time, so a blocked axis still lets the entity slide along the other one
         self.hit_box.x += self.direction.x * speed
+        self.collision(True)
         self.hit_box.y += self.direction.y * speed
-        self.rect.center += self.direction * speed
-
-    def is_tile_collision(self, group):
-        is_collide = [sprite for sprite in group if sprite.hit_box.colliderect(self.hit_box)]
-        if is_collide:
-            self.undo()
-        return is_collide
-
-    @staticmethod
-    def wave_value():
-        value = sin(pygame.time.get_ticks())
-        return 255 if value >= 0 else 0
+        self.collision(False)
+        self.rect.center = self.hit_box.center
+
+    def collision(self, horizontal):
+        if self.obstacles is None:
+            return
+
+        # the hit box is pushed back to the edge of whatever it ran into, in place
+        hit_box = self.hit_box
+        for sprite in self.obstacles.collide(hit_box):
+            obstacle = sprite.hit_box
+            if horizontal:
+                if self.direction.x > 0:
+                    hit_box.right = obstacle.left
+                elif self.direction.x < 0:
+                    hit_box.left = obstacle.right
+            else:
+                if self.direction.y > 0:
+                    hit_box.bottom = obstacle.top
+                elif self.direction.y < 0:
+                    hit_box.top = obstacle.bottom
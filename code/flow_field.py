@@ -0,0 +1,116 @@
+from collections import deque
+
+import numpy as np
+
+from code.settings import FLOW_FIELD_RADIUS, TILE_SIZE
+
+
+class FlowField:
+    # straight steps first, so they win ties against diagonal ones
+    steps = ((1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1))
+    # hit boxes are almost a tile wide, so they only fit through gaps when centered to the pixel
+    dead_zone = 1
+
+    def __init__(self, level_data, obstacles=None, radius=FLOW_FIELD_RADIUS, layer='FloorBlocks'):
+        self.layout = level_data[layer]
+        self.obstacles = obstacles
+        self.rows = level_data.rows
+        self.cols = level_data.cols
+        self.radius = radius
+        self.size = radius * 2 + 1
+
+        # a window of tiles centered on the player: BFS steps to the player and the neighbour to walk to
+        self.origin = (0, 0)
+        self.target = None
+        self.distance = np.full((self.size, self.size), -1, dtype=np.int32)
+        self.next_steps = np.zeros((self.size, self.size, 2), dtype=np.int32)
+        self.update_count = 0
+        self.step_offsets = np.array(self.steps, dtype=np.int32)
+
+    def blocked_window(self):
+        left, top = self.origin
+        blocked = np.ones((self.size, self.size), dtype=bool)
+        col_start, col_end = max(left, 0), min(left + self.size, self.cols)
+        if col_start >= col_end:
+            return blocked
+
+        rows = range(max(top, 0), min(top + self.size, self.rows))
+        for row_index in rows:
+            cells = np.asarray(self.layout[row_index][col_start:col_end])
+            blocked[row_index - top, col_start - left:col_end - left] = cells != -1
+
+        # grass and objects only exist where the world is loaded, so they come from the live obstacle grid
+        if self.obstacles is not None:
+            cells = self.obstacles.cells
+            for row_index in rows:
+                for col_index in range(col_start, col_end):
+                    if (col_index, row_index) in cells:
+                        blocked[row_index - top, col_index - left] = True
+        return blocked
+
+    def update(self, pos):
+        target = (int(pos[0]) // TILE_SIZE, int(pos[1]) // TILE_SIZE)
+        if target == self.target:
+            return False
+        self.target = target
+        self.origin = (target[0] - self.radius, target[1] - self.radius)
+        self.compute(self.blocked_window())
+        self.update_count += 1
+        return True
+
+    def compute(self, blocked):
+        size = self.size
+
+        # breadth first search from the player tile on a flat list with a wall border, so no bounds checks,
+        # diagonals may not cut wall corners
+        width = size + 2
+        walls = np.pad(blocked, 1, constant_values=True).ravel().tolist()
+        distance = [-1] * (width * width)
+        offsets = [(step_x + step_y * width, step_x, step_y * width) for step_x, step_y in self.steps]
+        start = (self.radius + 1) * width + self.radius + 1
+        distance[start] = 0
+        frontier = deque([start])
+        while frontier:
+            index = frontier.popleft()
+            next_distance = distance[index] + 1
+            for offset, offset_x, offset_y in offsets:
+                neighbour = index + offset
+                if distance[neighbour] >= 0 or walls[neighbour]:
+                    continue
+                if offset_x and offset_y and (walls[index + offset_x] or walls[index + offset_y]):
+                    continue
+                distance[neighbour] = next_distance
+                frontier.append(neighbour)
+        self.distance[:] = np.reshape(distance, (width, width))[1:-1, 1:-1]
+        distance = self.distance
+
+        # every reached tile points at its neighbour closest to the player, computed for all tiles at once
+        unreached = size * size
+        padded = np.pad(np.where(distance >= 0, distance, unreached), 1, constant_values=unreached)
+        free = np.pad(~blocked, 1, constant_values=False)
+        candidates = np.empty((len(self.steps), size, size), dtype=np.int32)
+        for index, (step_x, step_y) in enumerate(self.steps):
+            neighbour = padded[1 + step_y:1 + step_y + size, 1 + step_x:1 + step_x + size]
+            if step_x and step_y:
+                corner = free[1:1 + size, 1 + step_x:1 + step_x + size] & free[1 + step_y:1 + step_y + size, 1:1 + size]
+                neighbour = np.where(corner, neighbour, unreached)
+            candidates[index] = neighbour
+        self.next_steps[:] = self.step_offsets[np.argmin(candidates, axis=0)]
+        return self
+
+    def lookup(self, positions):
+        # directions for many world positions at once, valid only where the field knows a path
+        cols = (positions[:, 0] // TILE_SIZE).astype(np.int32) - self.origin[0]
+        rows = (positions[:, 1] // TILE_SIZE).astype(np.int32) - self.origin[1]
+        inside = (cols >= 0) & (cols < self.size) & (rows >= 0) & (rows < self.size)
+        cols, rows = np.where(inside, cols, 0), np.where(inside, rows, 0)
+
+        # next to the player the straight line is already free, so only tiles further away use the field
+        valid = inside & (self.distance[rows, cols] > 1)
+
+        # heading for the center of the next tile keeps wide hit boxes off the wall corners, in whole steps
+        # per axis, since a small sideways component is lost to the integer rects
+        cells = np.stack((cols + self.origin[0], rows + self.origin[1]), axis=1)
+        delta = (cells + self.next_steps[rows, cols]) * TILE_SIZE + TILE_SIZE / 2 - positions
+        directions = np.sign(delta) * (np.abs(delta) > self.dead_zone)
+        return directions, valid
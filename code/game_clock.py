@@ -0,0 +1,37 @@
+from math import sin
+
+import pygame
+
+
+class GameClock:
+    def __init__(self):
+        self.simulated = False
+        self.ticks = 0
+        self.flicker_phase = True
+
+    def get_ticks(self):
+        if self.simulated:
+            return int(self.ticks)
+        return pygame.time.get_ticks()
+
+    @property
+    def flicker(self):
+        # one blink phase shared by every hurt sprite, only worked out again when the clock moves
+        if self.simulated:
+            return self.flicker_phase
+        return sin(pygame.time.get_ticks()) >= 0
+
+    def simulate(self, start=0):
+        # the clock stops following the wall clock and only moves through advance()
+        self.simulated = True
+        self.ticks = start
+        self.flicker_phase = sin(self.get_ticks()) >= 0
+        return self
+
+    def advance(self, milliseconds):
+        self.ticks += milliseconds
+        self.flicker_phase = sin(self.get_ticks()) >= 0
+        return self
+
+
+game_clock = GameClock()
@@ -0,0 +1,64 @@
+import os
+from argparse import ArgumentParser
+from time import perf_counter
+
+import pygame
+
+from code.controls import ScriptedInput
+from code.debug import profiler
+from code.game_clock import game_clock
+from code.level import Level
+from code.settings import HEIGHT, SIM_TICK_RATE, WIDTH, WATER_COLOR
+from code.support import assets
+
+
+class HeadlessGame:
+    def __init__(self, input_source=None, render=False, level_data=None, dummy_display=False):
+
+        # no window: SDL gets a dummy video driver and the level draws into a plain surface
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+        pygame.init()
+        if dummy_display:
+            # a mode on the dummy driver lets surfaces use the display format, like the real game
+            self.surface = pygame.display.set_mode((WIDTH, HEIGHT))
+        else:
+            self.surface = pygame.Surface((WIDTH, HEIGHT))
+        self.render = render
+        # one step is one simulation tick, movement and animation are scaled for SIM_TICK_RATE as well
+        self.frame_time = 1000 / SIM_TICK_RATE
+        self.frame = 0
+
+        # the game clock only moves one frame per step, however fast the steps run
+        game_clock.simulate()
+        self.input_source = input_source or ScriptedInput()
+        self.level = Level(self.surface, self.input_source, level_data)
+        assets.save_pack()
+
+    def step(self):
+        if self.render:
+            self.surface.fill(WATER_COLOR)
+        with profiler.scope('level.run'):
+            self.level.run(self.render)
+        profiler.end_frame()
+        self.input_source.advance()
+        game_clock.advance(self.frame_time)
+        self.frame += 1
+        return self
+
+    def run(self, frames):
+        for _ in range(frames):
+            self.step()
+        return self
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Run the level without a display, as fast as possible.')
+    parser.add_argument('--frames', type=int, default=SIM_TICK_RATE * 60)
+    parser.add_argument('--render', action='store_true', help='draw every frame into an off-screen surface')
+    args = parser.parse_args()
+
+    game = HeadlessGame(render=args.render)
+    start = perf_counter()
+    game.run(args.frames)
+    elapsed = perf_counter() - start
+    print(f'{args.frames} frames in {elapsed:.2f}s ({args.frames / elapsed:.0f} frames/s)')
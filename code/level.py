@@ -1,96 +1,123 @@
-from random import choice, randint
+from heapq import merge
+from random import randint
 
 import pygame
 
+from code.activity import ActivitySystem
+from code.controls import keyboard
+from code.debug import profiler
+from code.depth import DynamicDepthIndex, StaticDepthIndex
 from code.enemy import Enemy, EnemyType
+from code.enemy_manager import EnemyManager
+from code.flow_field import FlowField
+from code.game_clock import game_clock
 from code.magic import MagicPlayer
-from code.particles import AnimationPlayer
+from code.particles import AnimationPlayer, Particle, ParticleSystem
 from code.player_ui_data import PlayerUiData
+from code.pool import SpritePool
 from code.settings import TILE_SIZE
-from code.support import ImportCsvLayout, ImportFolder
+from code.spatial import SpatialGrid
+from code.static_layer import StaticChunkLayer
+from code.streaming import WorldStreamer
+from code.support import ImportFolder, ImportLevel, assets, text_cache
 from code.upgrade import Upgrade
-from code.weapon import Weapon
+from code.weapon import Weapon, WeaponGraphics
 from player import Player
 from tile import Tile
 
 
 class Level:
-    def __init__(self):
+    enemy_types = {
+        390: EnemyType.BAMBOO,
+        391: EnemyType.SPIRIT,
+        392: EnemyType.RACCOON,
+        393: EnemyType.SQUID,
+    }
+
+    def __init__(self, display_surface=None, input_source=keyboard, level_data=None):
 
         # get the display surface
         self.player = None
-        self.display_surface = pygame.display.get_surface()
+        self.display_surface = display_surface or pygame.display.get_surface()
+        self.input_source = input_source
         self.game_paused = False
 
         # sprite group setup
-        self.visible_sprites = YSortCameraGroup()
+        self.visible_sprites = YSortCameraGroup(self.display_surface)
         self.obstacle_sprites = pygame.sprite.Group()
+        self.obstacle_grid = SpatialGrid()
 
         self.current_attack = None
+        self.weapon_graphics = WeaponGraphics()
+        self.weapon_pool = SpritePool(lambda: Weapon(self.weapon_graphics), size=1)
         self.attack_sprites = pygame.sprite.Group()
-        self.attackable_sprites = pygame.sprite.Group()
+        self.attackable_sprites = AttackableGroup()
+
+        # level data and enemy AI
+        self.level_data = level_data or ImportLevel.load()
+        self.enemy_manager = EnemyManager(FlowField(self.level_data, self.obstacle_grid))
+        self.activity = ActivitySystem((self.visible_sprites, self.enemy_manager))
 
         # sprite setup
+        self.graphics = {
+            "grass": ImportFolder.load("../graphics/Grass"),
+            "objects": ImportFolder.load("../graphics/objects")
+        }
+        self.world = WorldStreamer(self)
         self.create_map()
 
         # user interface
-        self.ui = PlayerUiData()
-        self.upgrade = Upgrade(self.player)
+        self.ui = PlayerUiData(self.display_surface)
+        self.upgrade = Upgrade(self.player, self.display_surface, self.input_source)
 
         # particles
-        self.animation_player = AnimationPlayer()
+        self.animation_player = AnimationPlayer(self.visible_sprites.particles)
         self.magic_player = MagicPlayer(self.animation_player)
 
     def create_map(self):
-        layouts = {
-            "boundary": ImportCsvLayout.load("../map/map_FloorBlocks.csv"),
-            "grass": ImportCsvLayout.load("../map/map_Grass.csv"),
-            "object": ImportCsvLayout.load("../map/map_Objects.csv"),
-            "entities": ImportCsvLayout.load("../map/map_Entities.csv"),
-        }
-        graphics = {
-            "grass": ImportFolder.load("../graphics/Grass"),
-            "objects": ImportFolder.load("../graphics/objects")
-        }
-
-        for style, layout in layouts.items():
-            for row_index, row in enumerate(layout):
-                for col_index, col in enumerate(row):
-                    if col != "-1":
-                        x = col_index * TILE_SIZE
-                        y = row_index * TILE_SIZE
-
-                        if style == "boundary":
-                            Tile((x, y), (self.obstacle_sprites,), "invisible")
-                        elif style == "grass":
-                            random_grass_image = choice(graphics["grass"])
-                            Tile(
-                                (x, y),
-                                (self.visible_sprites, self.obstacle_sprites, self.attackable_sprites),
-                                'grass', random_grass_image
-                            )
-                        elif style == "object":
-                            surf = graphics["objects"][int(col)]
-                            Tile((x, y), (self.visible_sprites, self.obstacle_sprites), 'object', surf)
-                        elif style == "entities":
-                            if col == "394":
-                                self.player = Player(
-                                    (x, y),
-                                    self.create_attack, self.destroy_attack,
-                                    self.create_magic, self.destroy_magic,
-                                    (self.visible_sprites,)
-                                )
-                            else:
-                                enemy_type = {
-                                    "390": EnemyType.BAMBOO,
-                                    "391": EnemyType.SPIRIT,
-                                    "392": EnemyType.RACCOON,
-                                    "393": EnemyType.SQUID,
-                                }[col]
-                                Enemy(
-                                    (x, y), enemy_type, self.damage_player, self.trigger_death_particles,
-                                    self.add_exp, (self.visible_sprites, self.attackable_sprites)
-                                )
+        # only the player is created up front, the rest of the world is streamed in around them
+        row_index, col_index = self.level_data.find("Entities", 394)
+        self.player = Player(
+            (col_index * TILE_SIZE, row_index * TILE_SIZE),
+            self.create_attack, self.destroy_attack,
+            self.create_magic, self.destroy_magic,
+            (self.visible_sprites,), self.input_source, self.obstacle_grid
+        )
+        self.world.update(self.player.rect.center)
+
+    def create_tile(self, style, pos, col):
+        if style == "boundary":
+            tile = Tile(pos, (self.obstacle_sprites,), "invisible")
+        elif style == "grass":
+            # picked from the position, so the grass looks the same every time it is streamed in
+            grass = self.graphics["grass"]
+            tile = Tile(
+                pos, (self.visible_sprites, self.obstacle_sprites, self.attackable_sprites),
+                'grass', grass[(pos[0] * 31 + pos[1] * 17) // TILE_SIZE % len(grass)]
+            )
+        else:
+            tile = Tile(pos, (self.visible_sprites, self.obstacle_sprites), 'object', self.graphics["objects"][col])
+        self.obstacle_grid.add(tile)
+        return tile
+
+    def create_enemy(self, pos, enemy_type):
+        enemy = Enemy(
+            pos, enemy_type, self.damage_player, self.trigger_death_particles,
+            self.add_exp, (self.visible_sprites, self.attackable_sprites), self.obstacle_grid
+        )
+        self.enemy_manager.add(enemy)
+        self.activity.add(enemy)
+        return enemy
+
+    def release(self, sprite):
+        # streamed out sprites leave every group and index they were in
+        sprite.kill()
+        self.obstacle_grid.remove(sprite)
+        self.activity.remove(sprite)
+
+    @property
+    def pool_stats(self):
+        return {'weapon': self.weapon_pool.stats, 'particles': self.visible_sprites.particles.stats}
 
     def add_exp(self, amount):
         self.player.exp += amount
@@ -98,100 +125,287 @@ class Level:
     def toggle_menu(self):
         self.game_paused = not self.game_paused
 
-    def run(self):
-        self.visible_sprites.custom_draw(self.player)
-        self.ui.display(self.player)
+    def run(self, render=True):
+        if render:
+            self.draw()
+        self.update()
 
+    def update(self):
+        # one fixed simulation tick
         if self.game_paused:
-            self.upgrade.display()
+            with profiler.scope('upgrade'):
+                self.upgrade.update()
         else:
-            self.update_game()
+            with profiler.scope('update_game'):
+                self.update_game()
+
+    def draw(self, alpha=1.0):
+        # alpha is how far the frame is between the previous tick and the current one
+        with profiler.scope('custom_draw'):
+            self.visible_sprites.custom_draw(self.player, 1.0 if self.game_paused else alpha)
+        with profiler.scope('ui.display'):
+            self.ui.display(self.player)
+        if self.game_paused:
+            with profiler.scope('upgrade'):
+                self.upgrade.display()
+
+        if profiler.enabled:
+            self.record_counters()
 
     def update_game(self):
-        self.visible_sprites.update()
-        self.check_tiles()
-        self.visible_sprites.enemy_update(self.player)
-        self.player_attack_logic()
+        with profiler.scope('streaming'):
+            self.world.update(self.player.rect.center)
+        with profiler.scope('activity'):
+            self.activity.update(self.player.rect.center)
+        with profiler.scope('visible_sprites.update'):
+            self.visible_sprites.update()
+        with profiler.scope('enemy_update'):
+            self.enemy_manager.update(self.player)
+        with profiler.scope('player_attack_logic'):
+            self.player_attack_logic()
+
+    def record_counters(self):
+        profiler.set_counter('sprites drawn', self.visible_sprites.drawn_count)
+        profiler.set_counter('sprites culled', self.visible_sprites.culled_count)
+        profiler.set_counter('chunks drawn', self.visible_sprites.chunk_count)
+        profiler.set_counter('collision checks', self.obstacle_grid.checks)
+        profiler.set_counter('particles alive', len(self.visible_sprites.particles))
+        profiler.set_counter('enemies awake', len(self.enemy_manager))
+        for name, value in self.world.stats.items():
+            profiler.set_counter(f'world {name}', value)
+        profiler.set_counter('assets loaded', assets.misses)
+        profiler.set_counter('text renders', text_cache.misses)
+        for name, stats in self.pool_stats.items():
+            profiler.set_counter(f'{name} pool size', stats['size'])
+            profiler.set_counter(f'{name} pool in use', stats['in_use'])
+            profiler.set_counter(f'{name} pool high water', stats['high_water'])
+        self.obstacle_grid.checks = 0
 
     def create_attack(self):
-        self.current_attack = Weapon(self.player, (self.visible_sprites, self.attack_sprites))
+        self.current_attack = self.weapon_pool.acquire((self.visible_sprites, self.attack_sprites), self.player)
 
     def destroy_attack(self):
         if self.current_attack:
-            self.current_attack.kill()
+            self.weapon_pool.release(self.current_attack)
         self.current_attack = None
 
     def create_magic(self, style, strength, cost):
         if style == "heal":
-            self.magic_player.heal(self.player, strength, cost, (self.visible_sprites,))
+            self.magic_player.heal(self.player, strength, cost)
 
         if style == "flame":
-            self.magic_player.flame(self.player, cost, (self.visible_sprites, self.attack_sprites))
+            self.magic_player.flame(self.player, cost)
 
     def destroy_magic(self):
         pass
 
-    def check_tiles(self):
-        self.player.is_tile_collision(group=self.obstacle_sprites)
-
     def player_attack_logic(self):
-        if self.attack_sprites:
-            for attack_sprite in self.attack_sprites:
-                collision_sprites = pygame.sprite.spritecollide(attack_sprite, self.attackable_sprites, False)
+        attack_sprites = self.attack_sprites.sprites() + self.visible_sprites.particles.attacks()
+        if attack_sprites:
+            self.attackable_sprites.refresh()
+            for attack_sprite in attack_sprites:
+                collision_sprites = self.attackable_sprites.collide(attack_sprite)
                 if collision_sprites:
                     for target_sprite in collision_sprites:
                         if isinstance(target_sprite, Tile) and target_sprite.sprite_type == 'grass':
                             offset = pygame.math.Vector2(0, 75)
                             for leaf in range(randint(3, 6)):
-                                self.animation_player.create_grass_particles(
-                                    target_sprite.rect.center - offset, (self.visible_sprites, )
-                                )
+                                self.animation_player.create_grass_particles(target_sprite.rect.center - offset)
+                            self.obstacle_grid.remove(target_sprite)
+                            self.world.destroy(target_sprite)
                             target_sprite.kill()
                         else:
+                            self.activity.wake(target_sprite)
                             target_sprite.get_damage(self.player, attack_sprite.sprite_type)
 
     def damage_player(self, amount, attack_type):
         if self.player.vulnerable:
             self.player.health -= amount
             self.player.vulnerable = False
-            self.player.hurt_time = pygame.time.get_ticks()
+            self.player.hurt_time = game_clock.get_ticks()
             # spawn particles
-            self.animation_player.create_particles(
-                attack_type, self.player.rect.center, (self.visible_sprites, )
-            )
+            self.animation_player.create_particles(attack_type, self.player.rect.center)
 
     def trigger_death_particles(self, pos, particle_type):
-        self.animation_player.create_particles(particle_type, pos, (self.visible_sprites, ))
+        self.animation_player.create_particles(particle_type, pos)
 
 
-class YSortCameraGroup(pygame.sprite.Group):
+class AttackableGroup(pygame.sprite.Group):
     def __init__(self):
+        super().__init__()
+
+        # broadphase for the attacks, keeping the order sprites joined the group in
+        self.grid = SpatialGrid(rect_attr='rect')
+        self.orders = {}
+        self.pending = {}
+        self.movers = {}
+        self.counter = 0
+
+    def add_internal(self, sprite, *args):
+        super().add_internal(sprite, *args)
+        self.counter += 1
+        self.orders[sprite] = self.counter
+
+        # sprites join their groups before their rect exists, so they are indexed on the next refresh
+        self.pending[sprite] = None
+        if not isinstance(sprite, Tile):
+            self.movers[sprite] = None
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        del self.orders[sprite]
+        self.pending.pop(sprite, None)
+        self.movers.pop(sprite, None)
+        self.grid.remove(sprite)
+
+    def refresh(self):
+        for sprite in self.pending:
+            self.grid.add(sprite)
+        self.pending.clear()
+
+        # only enemies move, and only the ones whose rect changed are looked at again
+        for sprite, rect in self.movers.items():
+            if sprite.rect != rect:
+                self.movers[sprite] = sprite.rect.copy()
+                self.grid.move(sprite)
+        return self
+
+    def collide(self, sprite):
+        # the same hits as pygame.sprite.spritecollide, in the same order
+        return sorted(self.grid.collide(sprite.rect), key=self.orders.__getitem__)
+
+
+class YSortCameraGroup(pygame.sprite.Group):
+    def __init__(self, display_surface=None):
         # general setup
         super().__init__()
-        self.display_surface = pygame.display.get_surface()
+        self.display_surface = display_surface or pygame.display.get_surface()
         self.half_width = self.display_surface.get_size()[0] // 2
         self.half_height = self.display_surface.get_size()[1] // 2
         self.offset = pygame.math.Vector2()
 
         # creating the floor
-        self.floor_surf = pygame.image.load('../graphics/tilemap/ground.png').convert()
+        self.floor_surf = assets.image('../graphics/tilemap/ground.png')
         self.floor_rect = self.floor_surf.get_rect(topleft=(0, 0))
 
-    def custom_draw(self, player):
-        # getting the offset
-        self.offset.x = player.rect.centerx - self.half_width
-        self.offset.y = player.rect.centery - self.half_height
-
-        # drawing the floor
-        floor_offset_pos = self.floor_rect.topleft - self.offset
-        self.display_surface.blit(self.floor_surf, floor_offset_pos)
-
-        # for sprite in self.sprites():
-        for sprite in sorted(self.sprites(), key=lambda spt: spt.rect.centery):
-            offset_pos = sprite.rect.topleft - self.offset
-            self.display_surface.blit(sprite.image, offset_pos)
-
-    def enemy_update(self, player):
-        enemy_sprites = [sprite for sprite in self.sprites() if isinstance(sprite, Enemy)]
-        for enemy in enemy_sprites:
-            enemy.enemy_update(player)
+        # culling and depth ordering setup
+        self.camera_rect = self.display_surface.get_rect()
+        self.static_sprites = StaticDepthIndex()
+        self.dynamic_sprites = DynamicDepthIndex()
+        self.active_sprites = {}
+        self.previous_positions = {}
+        self.pending_statics = {}
+        self.draw_counter = 0
+        self.particles = ParticleSystem(self.next_order)
+        self.drawn_count = 0
+        self.culled_count = 0
+        self.chunk_count = 0
+
+        # the floor and the static tiles are pre-rendered in chunks
+        self.static_layer = StaticChunkLayer(self.floor_surf, self.static_sprites)
+
+    def next_order(self):
+        self.draw_counter += 1
+        return self.draw_counter
+
+    def add_internal(self, sprite, *args):
+        super().add_internal(sprite, *args)
+        self.next_order()
+        if isinstance(sprite, Tile):
+            # sprites join their groups before their rect exists, so they are indexed on the next draw
+            self.pending_statics[sprite] = self.draw_counter
+        else:
+            self.dynamic_sprites.add(sprite, self.draw_counter)
+            self.active_sprites[sprite] = None
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        if isinstance(sprite, Tile):
+            if self.pending_statics.pop(sprite, None) is None:
+                self.static_layer.invalidate(sprite.rect)
+            self.static_sprites.remove(sprite)
+        else:
+            self.dynamic_sprites.remove(sprite)
+            self.active_sprites.pop(sprite, None)
+
+    def sleep(self, sprite):
+        self.active_sprites.pop(sprite, None)
+
+    def wake(self, sprite):
+        if self.has_internal(sprite):
+            self.active_sprites[sprite] = None
+
+    def update(self, *args, **kwargs):
+        # positions before the tick, so frames between two ticks can be interpolated
+        self.previous_positions = {sprite: sprite.rect.center for sprite in self.active_sprites}
+
+        # static tiles and sleeping sprites are not part of the update list
+        for sprite in list(self.active_sprites):
+            sprite.update(*args, **kwargs)
+        self.particles.update()
+
+    def index_statics(self):
+        for sprite, order in self.pending_statics.items():
+            self.static_sprites.add(sprite, order)
+            self.static_layer.invalidate(sprite.rect)
+        self.pending_statics.clear()
+
+    def render_pos(self, sprite, alpha):
+        # centers are interpolated, so a frame of another size does not shift the sprite, and a sprite that
+        # jumped further than a tile in one tick is drawn where it landed
+        rect = sprite.rect
+        x, y = rect.center
+        previous = self.previous_positions.get(sprite)
+        if previous is None or alpha >= 1 or abs(x - previous[0]) > TILE_SIZE or abs(y - previous[1]) > TILE_SIZE:
+            return rect.topleft
+        x, y = round(previous[0] + (x - previous[0]) * alpha), round(previous[1] + (y - previous[1]) * alpha)
+        return x - rect.width // 2, y - rect.height // 2
+
+    def custom_draw(self, player, alpha=1.0):
+        # getting the offset, following the interpolated player
+        player_x, player_y = self.render_pos(player, alpha)
+        self.offset.x = player_x + player.rect.width // 2 - self.half_width
+        self.offset.y = player_y + player.rect.height // 2 - self.half_height
+        self.camera_rect.topleft = self.offset
+
+        # drawing the floor and the static tiles
+        self.index_statics()
+        self.chunk_count = self.static_layer.draw(self.display_surface, self.camera_rect)
+
+        # dynamic sprites and particles in depth order, redrawing the static tiles that should stay in front of them
+        self.dynamic_sprites.refresh()
+        # sprites are culled a tile wider than the screen, since they can be drawn up to a tile from their rect
+        sprites = self.dynamic_sprites.query(self.camera_rect.inflate(TILE_SIZE * 2, TILE_SIZE * 2))
+        particles = self.particles.query(self.camera_rect)
+        self.drawn_count = len(sprites) + len(particles)
+        self.culled_count = len(self.dynamic_sprites) - len(sprites)
+
+        batch = []
+        surface = self.display_surface
+        for entry in merge(sprites, particles):
+            sprite = entry[2]
+
+            # the tiles in front are looked up where the sprite is actually drawn, between two ticks
+            drawn_rect = sprite.image.get_rect(topleft=self.render_pos(sprite, alpha))
+            offset_pos = (drawn_rect.x - self.offset.x, drawn_rect.y - self.offset.y)
+            tiles = [tile for _, _, tile in self.static_sprites.query(drawn_rect, after=entry)]
+
+            # runs of particles with nothing in front of them go out in a single blits call
+            if not tiles and isinstance(sprite, Particle):
+                batch.append((sprite.image, offset_pos))
+                continue
+            if batch:
+                surface.blits(batch, False)
+                batch.clear()
+
+            surface.blit(sprite.image, offset_pos)
+            if tiles:
+                # only the pixels the sprite covered are restored, a tall tile must not paint over nearer ones
+                clip = surface.get_clip()
+                surface.set_clip(clip.clip(drawn_rect.move(-self.offset.x, -self.offset.y)))
+                surface.blits([(tile.image, tile.rect.topleft - self.offset) for tile in tiles], False)
+                surface.set_clip(clip)
+            self.drawn_count += len(tiles)
+
+        if batch:
+            surface.blits(batch, False)
@@ -9,17 +9,17 @@ class MagicPlayer:
     def __init__(self, animation_player):
         self.animation_player = animation_player
 
-    def heal(self, player, strength, cost, groups):
+    def heal(self, player, strength, cost):
         if player.energy >= cost:
             player.health += strength
             player.energy -= cost
             if player.health >= player.stats['health']:
                 player.health = player.stats['health']
-            self.animation_player.create_particles('aura', player.rect.center, groups)
+            self.animation_player.create_particles('aura', player.rect.center)
             self.animation_player.create_particles(
-                'heal', player.rect.center + pygame.math.Vector2(0, -60), groups)
+                'heal', player.rect.center + pygame.math.Vector2(0, -60))
 
-    def flame(self, player, cost, groups):
+    def flame(self, player, cost):
         if player.energy >= cost:
             # player.energy -= cost
 
@@ -38,9 +38,9 @@ class MagicPlayer:
                     offset_x = (direction.x * i) * TILE_SIZE
                     x = player.rect.centerx + offset_x + randint(-TILE_SIZE // 3, TILE_SIZE // 3)
                     y = player.rect.centery + randint(-TILE_SIZE // 3, TILE_SIZE // 3)
-                    self.animation_player.create_particles('flame', (x, y), groups)
+                    self.animation_player.create_particles('flame', (x, y), attack=True)
                 else:  # vertical
                     offset_y = (direction.y * i) * TILE_SIZE
                     x = player.rect.centerx + randint(-TILE_SIZE // 3, TILE_SIZE // 3)
                     y = player.rect.centery + offset_y + randint(-TILE_SIZE // 3, TILE_SIZE // 3)
-                    self.animation_player.create_particles('flame', (x, y), groups)
+                    self.animation_player.create_particles('flame', (x, y), attack=True)
@@ -2,6 +2,9 @@ import pygame
 import sys
 
 from code import settings
+from code.debug import profiler
+from code.game_clock import game_clock
+from code.support import AssetLoader, assets
 from level import Level
 from settings import *
 
@@ -15,9 +18,56 @@ class Game:
         pygame.display.set_caption('Zelda')
         self.clock = pygame.time.Clock()
 
+        # the simulation only moves in fixed ticks, the game clock follows the ticks instead of the wall clock
+        self.tick_time = 1000 / SIM_TICK_RATE
+        self.accumulator = 0
+        game_clock.simulate(pygame.time.get_ticks())
+
+        self.load_assets()
         self.level = Level()
+        assets.save_pack()
+
+    def load_assets(self):
+        self.loading_drawn = (None, 0)
+        loader = AssetLoader()
+        for path, priority in ASSET_PRELOAD:
+            loader.add_tree(path, priority)
+        loader.load(self.loading_screen)
+
+    def loading_screen(self, progress):
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                sys.exit()
+
+        bar_rect = pygame.Rect(0, 0, WIDTH // 2, BAR_HEIGHT)
+        bar_rect.center = (WIDTH // 2, HEIGHT // 2)
+        progress_rect = bar_rect.copy()
+        progress_rect.width = round(bar_rect.width * progress)
+
+        # the screen is only drawn again once the bar has grown and the last update is a while ago
+        width, drawn_time = self.loading_drawn
+        now = pygame.time.get_ticks()
+        if progress_rect.width == width or (width is not None and now - drawn_time < LOADING_SCREEN_INTERVAL):
+            return
+        self.loading_drawn = (progress_rect.width, now)
+
+        self.screen.fill(UI_BG_COLOR)
+        pygame.draw.rect(self.screen, ENERGY_COLOR, progress_rect)
+        pygame.draw.rect(self.screen, UI_BORDER_COLOR, bar_rect, 3)
+        pygame.display.update()
+
+    def simulate(self, elapsed):
+        # a slow frame runs several ticks, capped so the game never falls further and further behind
+        self.accumulator = min(self.accumulator + elapsed, self.tick_time * MAX_TICKS_PER_FRAME)
+        while self.accumulator >= self.tick_time:
+            self.level.update()
+            game_clock.advance(self.tick_time)
+            self.accumulator -= self.tick_time
+        return self.accumulator / self.tick_time
 
     def run(self):
+        elapsed = 0
         while True:
             for event in pygame.event.get():
                 if event.type == pygame.QUIT or \
@@ -27,11 +77,23 @@ class Game:
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_m:
                         self.level.toggle_menu()
+                    if event.key == pygame.K_F3:
+                        profiler.toggle()
+                    if event.key == pygame.K_F4:
+                        profiler.export(PROFILER_TRACE_PATH)
+
+            with profiler.scope('simulation'):
+                alpha = self.simulate(elapsed)
 
             self.screen.fill(settings.WATER_COLOR)
-            self.level.run()
-            pygame.display.update()
-            self.clock.tick(FPS)
+            with profiler.scope('level.draw'):
+                self.level.draw(alpha)
+            profiler.draw(self.screen)
+            with profiler.scope('display.update'):
+                pygame.display.update()
+            with profiler.scope('clock.tick'):
+                elapsed = self.clock.tick(FPS)
+            profiler.end_frame()
 
 
 if __name__ == '__main__':
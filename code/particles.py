@@ -1,12 +1,14 @@
 from random import choice
 
-import pygame
+import numpy as np
 
-from support import ImportFolder
+from code.settings import PARTICLE_CAPACITY, TICK_SCALE
+from code.support import ImportFolder
 
 
 class AnimationPlayer:
-    def __init__(self):
+    def __init__(self, particles):
+        self.particles = particles
         self.frames = {
             # magic
             'flame': ImportFolder.load('../graphics/particles/flame/frames'),
@@ -34,49 +36,134 @@ class AnimationPlayer:
                 ImportFolder.load('../graphics/particles/leaf4'),
                 ImportFolder.load('../graphics/particles/leaf5'),
                 ImportFolder.load('../graphics/particles/leaf6'),
-                self.reflect_images(ImportFolder.load('../graphics/particles/leaf1')),
-                self.reflect_images(ImportFolder.load('../graphics/particles/leaf2')),
-                self.reflect_images(ImportFolder.load('../graphics/particles/leaf3')),
-                self.reflect_images(ImportFolder.load('../graphics/particles/leaf4')),
-                self.reflect_images(ImportFolder.load('../graphics/particles/leaf5')),
-                self.reflect_images(ImportFolder.load('../graphics/particles/leaf6'))
+                ImportFolder.load('../graphics/particles/leaf1', flip_x=True),
+                ImportFolder.load('../graphics/particles/leaf2', flip_x=True),
+                ImportFolder.load('../graphics/particles/leaf3', flip_x=True),
+                ImportFolder.load('../graphics/particles/leaf4', flip_x=True),
+                ImportFolder.load('../graphics/particles/leaf5', flip_x=True),
+                ImportFolder.load('../graphics/particles/leaf6', flip_x=True)
             )
         }
 
-    @staticmethod
-    def reflect_images(frames):
-        new_frames = []
+        # every frame set is registered once and particles only keep its id
+        self.frame_ids = {}
+        for animation_type, frames in self.frames.items():
+            if animation_type == 'leaf':
+                self.frame_ids[animation_type] = tuple(self.particles.add_frames(leaf) for leaf in frames)
+            else:
+                self.frame_ids[animation_type] = self.particles.add_frames(frames)
 
-        for frame in frames:
-            flipped_frame = pygame.transform.flip(frame, True, False)
-            new_frames.append(flipped_frame)
-        return new_frames
+    def create_grass_particles(self, pos):
+        self.particles.spawn(pos, choice(self.frame_ids['leaf']))
 
-    def create_grass_particles(self, pos, groups):
-        animation_frames = choice(self.frames['leaf'])
-        ParticleEffect(pos, animation_frames, groups)
+    def create_particles(self, animation_type, pos, attack=False):
+        self.particles.spawn(pos, self.frame_ids[animation_type], attack)
 
-    def create_particles(self, animation_type, pos, groups):
-        animation_frames = self.frames[animation_type]
-        ParticleEffect(pos, animation_frames, groups)
 
+class Particle:
+    __slots__ = ('slot', 'image', 'rect', 'sprite_type')
 
-class ParticleEffect(pygame.sprite.Sprite):
-    def __init__(self, pos, animation_frames, groups):
-        super().__init__(*groups)
+    def __init__(self, slot):
+        self.slot = slot
+        self.image = None
+        self.rect = None
         self.sprite_type = "magic"
-        self.index = 0
-        self.animation_speed = 0.15
-        self.frames = animation_frames
-        self.image = self.frames[self.index]
-        self.rect = self.image.get_rect(center=pos)
-
-    def animate(self):
-        self.index += self.animation_speed
-        if self.index >= len(self.frames):
-            self.kill()
-        else:
-            self.image = self.frames[int(self.index)]
+
+
+class ParticleSystem:
+    def __init__(self, next_order, capacity=PARTICLE_CAPACITY, animation_speed=0.15 * TICK_SCALE):
+        self.next_order = next_order
+        self.animation_speed = animation_speed
+        self.frame_sets = []
+
+        # slot state, one entry per preallocated particle
+        self.capacity = 0
+        self.alive = np.zeros(0, dtype=bool)
+        self.attack = np.zeros(0, dtype=bool)
+        self.frame_set = np.zeros(0, dtype=np.int32)
+        self.frame_count = np.zeros(0, dtype=np.int32)
+        self.index = np.zeros(0)
+        self.order = np.zeros(0, dtype=np.int64)
+        self.centery = np.zeros(0, dtype=np.int32)
+        self.bounds = np.zeros((0, 4), dtype=np.int32)
+        self.particles = []
+        self.free = []
+        self.high_water = 0
+        self.grow(capacity)
+
+    def __len__(self):
+        return self.capacity - len(self.free)
+
+    @property
+    def stats(self):
+        return {'size': self.capacity, 'in_use': len(self), 'high_water': self.high_water}
+
+    def grow(self, capacity):
+        extra = capacity - self.capacity
+        for name in ('alive', 'attack', 'frame_set', 'frame_count', 'index', 'order', 'centery', 'bounds'):
+            values = getattr(self, name)
+            setattr(self, name, np.concatenate((values, np.zeros((extra,) + values.shape[1:], dtype=values.dtype))))
+
+        self.particles.extend(Particle(slot) for slot in range(self.capacity, capacity))
+        self.free = list(range(capacity - 1, self.capacity - 1, -1)) + self.free
+        self.capacity = capacity
+
+    def add_frames(self, frames):
+        self.frame_sets.append(frames)
+        return len(self.frame_sets) - 1
+
+    def spawn(self, pos, frame_set, attack=False):
+        if not self.free:
+            self.grow(self.capacity * 2)
+        slot = self.free.pop()
+
+        frames = self.frame_sets[frame_set]
+        particle = self.particles[slot]
+        particle.image = frames[0]
+        particle.rect = particle.image.get_rect(center=pos)
+
+        self.alive[slot] = True
+        self.attack[slot] = attack
+        self.frame_set[slot] = frame_set
+        self.frame_count[slot] = len(frames)
+        self.index[slot] = 0
+        self.order[slot] = self.next_order()
+        self.centery[slot] = particle.rect.centery
+        self.bounds[slot] = particle.rect
+        self.high_water = max(self.high_water, len(self))
+        return particle
 
     def update(self):
-        self.animate()
+        slots = np.flatnonzero(self.alive)
+        if not len(slots):
+            return
+
+        # advance every animation at once and free the finished ones
+        self.index[slots] += self.animation_speed
+        finished = slots[self.index[slots] >= self.frame_count[slots]]
+        self.alive[finished] = False
+        self.free.extend(finished.tolist())
+
+    def query(self, rect):
+        left, top, width, height = self.bounds.T
+        slots = np.flatnonzero(
+            self.alive & (left < rect.right) & (left + width > rect.left) & (top < rect.bottom) & (top + height > rect.top)
+        )
+        if not len(slots):
+            return []
+
+        # sorted by the same (centery, order) key as the camera sprites
+        slots = slots[np.lexsort((self.order[slots], self.centery[slots]))]
+        entries = []
+        for slot, centery, order, frame_set, index in zip(
+                slots.tolist(), self.centery[slots].tolist(), self.order[slots].tolist(),
+                self.frame_set[slots].tolist(), self.index[slots].astype(int).tolist()):
+            particle = self.particles[slot]
+            particle.image = self.frame_sets[frame_set][index]
+            entries.append((centery, order, particle))
+        return entries
+
+    def attacks(self):
+        slots = np.flatnonzero(self.alive & self.attack)
+        slots = slots[np.argsort(self.order[slots])]
+        return [self.particles[slot] for slot in slots.tolist()]
@@ -2,15 +2,18 @@ import os
 
 import pygame
 
+from code.controls import keyboard
 from code.entity import Entity
-from code.settings import weapon_data, magic_data
+from code.game_clock import game_clock
+from code.settings import TICK_SCALE, weapon_data, magic_data
 from code.status_manager import PlayerStatusManager
-from code.support import ImportFolder
 
 
 class Player(Entity):
-    def __init__(self, pos, create_attack, destroy_attack, create_magic, destroy_magic, groups):
-        super().__init__(pos, '../graphics/test/player.png', groups)
+    def __init__(self, pos, create_attack, destroy_attack, create_magic, destroy_magic, groups, input_source=keyboard,
+                 obstacles=None):
+        super().__init__(pos, '../graphics/test/player.png', groups, obstacles)
+        self.input_source = input_source
         self.status = PlayerStatusManager(self)
         self.import_player_assets()
 
@@ -57,12 +60,11 @@ class Player(Entity):
         }
         for animation in self.animations.keys():
             full_path = os.path.normpath(os.path.join(character_path, animation))
-            self.animations[animation] = ImportFolder.load(full_path)
+            self.import_animation(animation, full_path)
 
     def input(self):
-        self.update_undo()
         if not self.attacking:
-            keys = pygame.key.get_pressed()
+            keys = self.input_source.get_pressed()
             if keys[pygame.K_UP]:
                 self.direction.y = -1
                 self.status.up()
@@ -83,11 +85,11 @@ class Player(Entity):
 
             if keys[pygame.K_SPACE]:
                 self.attacking = True
-                self.attack_time = pygame.time.get_ticks()
+                self.attack_time = game_clock.get_ticks()
                 self.create_attack()
             if keys[pygame.K_LCTRL]:
                 self.attacking = True
-                self.attack_time = pygame.time.get_ticks()
+                self.attack_time = game_clock.get_ticks()
                 style = list(magic_data.keys())[self.magic_index]
                 strength = list(magic_data.values())[self.magic_index]['strength'] + self.stats['magic']
                 cost = list(magic_data.values())[self.magic_index]['cost']
@@ -95,13 +97,13 @@ class Player(Entity):
 
             if keys[pygame.K_q] and self.can_switch_weapon:
                 self.can_switch_weapon = False
-                self.weapon_switch_time = pygame.time.get_ticks()
+                self.weapon_switch_time = game_clock.get_ticks()
                 self.weapon_index = (self.weapon_index + 1) % len(list(weapon_data.keys()))
                 self.weapon = list(weapon_data.keys())[self.weapon_index]
 
             if keys[pygame.K_e] and self.can_switch_magic:
                 self.can_switch_magic = False
-                self.magic_switch_time = pygame.time.get_ticks()
+                self.magic_switch_time = game_clock.get_ticks()
                 self.magic_index = (self.magic_index + 1) % len(list(magic_data.keys()))
                 self.magic = list(magic_data.keys())[self.magic_index]
 
@@ -109,7 +111,7 @@ class Player(Entity):
         self.status.update()
 
     def cool_downs(self):
-        current_time = pygame.time.get_ticks()
+        current_time = game_clock.get_ticks()
         if self.attacking:
             if current_time - self.attack_time >= self.attack_cooldown:
                 self.attacking = False
@@ -132,13 +134,8 @@ class Player(Entity):
     def animate(self):
         animation = self.animations[self.status.value]
         self.index = (self.index + self.animation_speed) % len(animation)
-        self.image = animation[int(self.index)]
+        self.image = self.frame(self.status.value, int(self.index))
         self.rect = self.image.get_rect(center=self.hit_box.center)
-        # flicker
-        if not self.vulnerable:
-            self.image.set_alpha(self.wave_value())
-        else:
-            self.image.set_alpha(255)
 
     def get_full_weapon_damage(self):
         base_damage = self.stats['attack']
@@ -152,7 +149,7 @@ class Player(Entity):
 
     def energy_recovery(self):
         if self.energy <= self.stats["energy"]:
-            self.energy += 0.01 * self.stats["magic"]
+            self.energy += 0.01 * self.stats["magic"] * TICK_SCALE
         else:
             self.energy = self.stats["energy"]
 
@@ -2,13 +2,30 @@ import pygame
 
 from code.settings import ENERGY_BAR_WIDTH, UI_FONT, UI_FONT_SIZE, HEALTH_BAR_WIDTH, BAR_HEIGHT, UI_BORDER_COLOR, \
     weapon_data, UI_BG_COLOR, TEXT_COLOR, ITEM_BOX_SIZE, UI_BORDER_COLOR_ACTIVE, HEALTH_COLOR, ENERGY_COLOR, magic_data
+from code.support import assets, convert_surface, text_cache
+
+
+class HudWidget:
+    def __init__(self, render):
+        self.render = render
+        self.value = None
+        self.blit = None
+        self.render_count = 0
+
+    def get(self, value):
+        # the widget is only drawn again when the value it shows changes
+        if self.blit is None or value != self.value:
+            self.value = value
+            self.blit = self.render(value)
+            self.render_count += 1
+        return self.blit
 
 
 class PlayerUiData:
-    def __init__(self):
+    def __init__(self, display_surface=None):
 
         # general
-        self.display_surface = pygame.display.get_surface()
+        self.display_surface = display_surface or pygame.display.get_surface()
         self.font = pygame.font.Font(UI_FONT, UI_FONT_SIZE)
 
         # bar setup
@@ -16,69 +33,81 @@ class PlayerUiData:
         self.energy_bar_rect = pygame.Rect(10, 34, ENERGY_BAR_WIDTH, BAR_HEIGHT)
 
         # convert weapon dictionary
-        self.weapon_graphics = [
-            pygame.image.load(weapon['graphic']).convert_alpha()
-            for weapon in weapon_data.values()
-        ]
+        self.weapon_graphics = [assets.image(weapon['graphic']) for weapon in weapon_data.values()]
 
         # convert magic dictionary
-        self.magic_graphics = [
-            pygame.image.load(magic['graphic']).convert_alpha()
-            for magic in magic_data.values()
-        ]
+        self.magic_graphics = [assets.image(magic['graphic']) for magic in magic_data.values()]
 
-    def show_bar(self, current, max_amount, bg_rect, color):
-        # draw bg
-        pygame.draw.rect(self.display_surface, UI_BG_COLOR, bg_rect)
+        # cached widgets, each one keyed on what it shows
+        self.health_widget = HudWidget(lambda width: self.show_bar(width, self.health_bar_rect, HEALTH_COLOR))
+        self.energy_widget = HudWidget(lambda width: self.show_bar(width, self.energy_bar_rect, ENERGY_COLOR))
+        self.exp_widget = HudWidget(self.show_exp)
+        self.weapon_widget = HudWidget(lambda value: self.weapon_overlay(*value))
+        self.magic_widget = HudWidget(lambda value: self.magic_overlay(*value))
 
+    @property
+    def widgets(self):
+        return self.health_widget, self.energy_widget, self.exp_widget, self.weapon_widget, self.magic_widget
+
+    @staticmethod
+    def bar_width(current, max_amount, bg_rect):
         # converting stat to pixel
-        ratio = current / max_amount
-        current_width = bg_rect.width * ratio
-        current_rect = bg_rect.copy()
+        return round(bg_rect.width * current / max_amount)
+
+    def show_bar(self, current_width, bg_rect, color):
+        # draw bg
+        surface = convert_surface(pygame.Surface(bg_rect.size), alpha=False)
+        local_rect = surface.get_rect()
+        pygame.draw.rect(surface, UI_BG_COLOR, local_rect)
+
+        current_rect = local_rect.copy()
         current_rect.width = current_width
 
         # drawing the bar
-        pygame.draw.rect(self.display_surface, color, current_rect)
-        pygame.draw.rect(self.display_surface, UI_BORDER_COLOR, bg_rect, 3)
+        pygame.draw.rect(surface, color, current_rect)
+        pygame.draw.rect(surface, UI_BORDER_COLOR, local_rect, 3)
+        return surface, bg_rect.topleft
 
     def show_exp(self, exp):
-        text_surf = self.font.render(str(int(exp)), False, TEXT_COLOR)
+        text_surf = text_cache.render(self.font, str(exp), False, TEXT_COLOR)
         x = self.display_surface.get_size()[0] - 20
         y = self.display_surface.get_size()[1] - 20
-        text_rect = text_surf.get_rect(bottomright=(x, y))
-
-        pygame.draw.rect(self.display_surface, UI_BG_COLOR, text_rect.inflate(20, 20))
-        self.display_surface.blit(text_surf, text_rect)
-        pygame.draw.rect(self.display_surface, UI_BORDER_COLOR, text_rect.inflate(20, 20), 3)
-
-    def selection_box(self, left, top, has_switched):
-        bg_rect = pygame.Rect(left, top, ITEM_BOX_SIZE, ITEM_BOX_SIZE)
-        pygame.draw.rect(self.display_surface, UI_BG_COLOR, bg_rect)
+        bg_rect = text_surf.get_rect(bottomright=(x, y)).inflate(20, 20)
+
+        surface = convert_surface(pygame.Surface(bg_rect.size), alpha=False)
+        local_rect = surface.get_rect()
+        pygame.draw.rect(surface, UI_BG_COLOR, local_rect)
+        surface.blit(text_surf, text_surf.get_rect(center=local_rect.center))
+        pygame.draw.rect(surface, UI_BORDER_COLOR, local_rect, 3)
+        return surface, bg_rect.topleft
+
+    @staticmethod
+    def selection_box(has_switched):
+        surface = convert_surface(pygame.Surface((ITEM_BOX_SIZE, ITEM_BOX_SIZE)), alpha=False)
+        bg_rect = surface.get_rect()
+        pygame.draw.rect(surface, UI_BG_COLOR, bg_rect)
         if has_switched:
-            pygame.draw.rect(self.display_surface, UI_BORDER_COLOR_ACTIVE, bg_rect, 3)
+            pygame.draw.rect(surface, UI_BORDER_COLOR_ACTIVE, bg_rect, 3)
         else:
-            pygame.draw.rect(self.display_surface, UI_BORDER_COLOR, bg_rect, 3)
-        return bg_rect
+            pygame.draw.rect(surface, UI_BORDER_COLOR, bg_rect, 3)
+        return surface
 
-    def weapon_overlay(self, weapon_index, has_switched):
-        bg_rect = self.selection_box(10, 630, has_switched)
-        weapon_surf = self.weapon_graphics[weapon_index]
-        weapon_rect = weapon_surf.get_rect(center=bg_rect.center)
+    def item_overlay(self, graphic, left, top, has_switched):
+        surface = self.selection_box(has_switched)
+        surface.blit(graphic, graphic.get_rect(center=surface.get_rect().center))
+        return surface, (left, top)
 
-        self.display_surface.blit(weapon_surf, weapon_rect)
+    def weapon_overlay(self, weapon_index, has_switched):
+        return self.item_overlay(self.weapon_graphics[weapon_index], 10, 630, has_switched)
 
     def magic_overlay(self, magic_index, has_switched):
-        bg_rect = self.selection_box(80, 635, has_switched)
-        magic_surf = self.magic_graphics[magic_index]
-        magic_rect = magic_surf.get_rect(center=bg_rect.center)
-
-        self.display_surface.blit(magic_surf, magic_rect)
+        return self.item_overlay(self.magic_graphics[magic_index], 80, 635, has_switched)
 
     def display(self, player):
-        self.show_bar(player.health, player.stats['health'], self.health_bar_rect, HEALTH_COLOR)
-        self.show_bar(player.energy, player.stats['energy'], self.energy_bar_rect, ENERGY_COLOR)
-
-        self.show_exp(player.exp)
-
-        self.weapon_overlay(player.weapon_index, not player.can_switch_weapon)
-        self.magic_overlay(player.magic_index, not player.can_switch_magic)
+        self.display_surface.blits((
+            self.health_widget.get(self.bar_width(player.health, player.stats['health'], self.health_bar_rect)),
+            self.energy_widget.get(self.bar_width(player.energy, player.stats['energy'], self.energy_bar_rect)),
+            self.exp_widget.get(int(player.exp)),
+            self.weapon_widget.get((player.weapon_index, not player.can_switch_weapon)),
+            self.magic_widget.get((player.magic_index, not player.can_switch_magic))
+        ), False)
@@ -0,0 +1,31 @@
+class SpritePool:
+    def __init__(self, factory, size=0):
+        self.factory = factory
+        self.free = [factory() for _ in range(size)]
+        self.size = size
+        self.in_use = 0
+        self.high_water = 0
+
+    @property
+    def stats(self):
+        return {'size': self.size, 'in_use': self.in_use, 'high_water': self.high_water}
+
+    def acquire(self, groups, *args, **kwargs):
+        if self.free:
+            sprite = self.free.pop()
+        else:
+            sprite = self.factory()
+            self.size += 1
+
+        # the sprite state is reset before it joins its groups again
+        sprite.reset(*args, **kwargs)
+        sprite.add(*groups)
+        self.in_use += 1
+        self.high_water = max(self.high_water, self.in_use)
+        return sprite
+
+    def release(self, sprite):
+        sprite.kill()
+        self.free.append(sprite)
+        self.in_use -= 1
+        return self
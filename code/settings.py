@@ -10,6 +10,62 @@ HEIGHT = 720
 FPS = 60
 TILE_SIZE = 64
 
+# the simulation runs at a fixed tick rate, independent of how often frames are drawn (FPS = 0 draws uncapped)
+BASE_TICK_RATE = 60
+SIM_TICK_RATE = 60
+TICK_SCALE = BASE_TICK_RATE / SIM_TICK_RATE
+MAX_TICKS_PER_FRAME = 5
+CHUNK_SIZE = 16
+
+# level layers are compiled from the csv files into one binary file
+LEVEL_CSV_PATH = '../map/map_{}.csv'
+LEVEL_COMPILED_PATH = '../map/map.level'
+LEVEL_LAYERS = ('Floor', 'FloorBlocks', 'Grass', 'Objects', 'Entities', 'Details', 'LargeObjects')
+
+# enemies further than this from the active area around the player are put to sleep
+ACTIVITY_MARGIN = TILE_SIZE * 2
+
+# hurt entities blink between their frames and baked copies with this alpha
+FLICKER_ALPHA = 0
+
+# enemies path to the player through a flow field over this many tiles around them
+FLOW_FIELD_RADIUS = 12
+
+# the world is streamed in chunks of STREAM_CHUNK_SIZE tiles, loaded this far beyond the active area
+STREAM_CHUNK_SIZE = 8
+STREAM_MARGIN = TILE_SIZE * 8
+
+# particle slots allocated up front, the pool doubles when it runs out
+PARTICLE_CAPACITY = 256
+
+# asset cache limit in bytes, None keeps every loaded surface
+ASSET_CACHE_MAX_BYTES = None
+
+# decoded pixels of every loaded image are packed into one file for fast warm starts, None disables it
+ASSET_PACK_PATH = '../graphics.pack'
+
+# images without transparency, kept in the display format without an alpha channel
+ASSET_OPAQUE = ('../graphics/tilemap/ground.png',)
+
+# assets decoded on a thread pool behind the loading screen, lower priorities load first
+ASSET_LOADER_WORKERS = 4
+LOADING_SCREEN_INTERVAL = 50
+ASSET_PRELOAD = (
+    ('../graphics/tilemap/ground.png', 0),
+    ('../graphics/player', 0),
+    ('../graphics/Grass', 0),
+    ('../graphics/objects', 0),
+    ('../graphics/weapons', 0),
+    ('../graphics/monsters', 1),
+    ('../graphics/particles', 2),
+)
+
+# rendered text surfaces kept by the text cache
+TEXT_CACHE_SIZE = 256
+
+# profiler (F3 toggles the overlay, F4 writes a Chrome trace)
+PROFILER_TRACE_PATH = '../profile_trace.json'
+
 # ui
 BAR_HEIGHT = 20
 HEALTH_BAR_WIDTH = 200
@@ -0,0 +1,65 @@
+from code.settings import TILE_SIZE
+
+
+def cells_for(rect, cell_size):
+    # every cell of a grid of cell_size squares that the rect overlaps
+    left, top = rect.left // cell_size, rect.top // cell_size
+    right, bottom = (rect.right - 1) // cell_size, (rect.bottom - 1) // cell_size
+    return [(x, y) for y in range(top, bottom + 1) for x in range(left, right + 1)]
+
+
+class SpatialGrid:
+    def __init__(self, cell_size=TILE_SIZE, rect_attr='hit_box'):
+        self.cell_size = cell_size
+        self.rect_attr = rect_attr
+
+        # cell -> sprites (dicts keep the insertion order stable)
+        self.cells = {}
+        self.sprite_cells = {}
+        self.checks = 0
+
+    def __len__(self):
+        return len(self.sprite_cells)
+
+    def __contains__(self, sprite):
+        return sprite in self.sprite_cells
+
+    def cells_for(self, rect):
+        return cells_for(rect, self.cell_size)
+
+    def add(self, sprite):
+        if sprite in self.sprite_cells:
+            self.remove(sprite)
+
+        keys = self.cells_for(getattr(sprite, self.rect_attr))
+        for key in keys:
+            self.cells.setdefault(key, {})[sprite] = None
+        self.sprite_cells[sprite] = keys
+        return self
+
+    def remove(self, sprite):
+        for key in self.sprite_cells.pop(sprite, ()):
+            cell = self.cells[key]
+            del cell[sprite]
+            if not cell:
+                del self.cells[key]
+        return self
+
+    def move(self, sprite):
+        keys = self.cells_for(getattr(sprite, self.rect_attr))
+        if keys != self.sprite_cells.get(sprite):
+            self.add(sprite)
+        return self
+
+    def query(self, rect):
+        found = {}
+        for key in self.cells_for(rect):
+            cell = self.cells.get(key)
+            if cell:
+                found.update(cell)
+        return list(found)
+
+    def collide(self, rect):
+        candidates = self.query(rect)
+        self.checks += len(candidates)
+        return [sprite for sprite in candidates if getattr(sprite, self.rect_attr).colliderect(rect)]
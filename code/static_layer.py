@@ -0,0 +1,56 @@
+import pygame
+
+from code.settings import CHUNK_SIZE, TILE_SIZE, WATER_COLOR
+from code.spatial import cells_for
+from code.support import convert_surface
+
+
+class StaticChunkLayer:
+    def __init__(self, floor_surf, static_sprites, chunk_size=CHUNK_SIZE * TILE_SIZE):
+        self.floor_surf = floor_surf
+        self.static_sprites = static_sprites
+        self.chunk_size = chunk_size
+        self.world_rect = floor_surf.get_rect()
+
+        # chunk -> baked surface, only kept while nothing inside the chunk changes
+        self.surfaces = {}
+        self.bake_count = 0
+
+    def chunks_for(self, rect):
+        return cells_for(rect, self.chunk_size)
+
+    def chunk_rect(self, chunk):
+        return pygame.Rect(chunk[0] * self.chunk_size, chunk[1] * self.chunk_size, self.chunk_size, self.chunk_size)
+
+    def invalidate(self, rect):
+        self.world_rect.union_ip(rect)
+        for chunk in self.chunks_for(rect):
+            self.surfaces.pop(chunk, None)
+        return self
+
+    def bake(self, chunk):
+        chunk_rect = self.chunk_rect(chunk)
+        surface = convert_surface(pygame.Surface(chunk_rect.size), alpha=False)
+        surface.fill(WATER_COLOR)
+        surface.blit(self.floor_surf, (-chunk_rect.left, -chunk_rect.top))
+
+        for _, _, sprite in self.static_sprites.query(chunk_rect):
+            surface.blit(sprite.image, (sprite.rect.left - chunk_rect.left, sprite.rect.top - chunk_rect.top))
+
+        self.surfaces[chunk] = surface
+        self.bake_count += 1
+        return surface
+
+    def draw(self, display_surface, camera_rect):
+        drawn = 0
+        for chunk in self.chunks_for(camera_rect):
+            chunk_rect = self.chunk_rect(chunk)
+            if not chunk_rect.colliderect(self.world_rect):
+                continue
+
+            surface = self.surfaces.get(chunk)
+            if surface is None:
+                surface = self.bake(chunk)
+            display_surface.blit(surface, (chunk_rect.left - camera_rect.left, chunk_rect.top - camera_rect.top))
+            drawn += 1
+        return drawn
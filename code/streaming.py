@@ -0,0 +1,133 @@
+import pygame
+
+from code.settings import STREAM_CHUNK_SIZE, STREAM_MARGIN, TILE_SIZE
+from code.spatial import cells_for
+
+
+class WorldStreamer:
+    # tile styles and the level layer they come from
+    layers = (('boundary', 'FloorBlocks'), ('grass', 'Grass'), ('object', 'Objects'))
+
+    def __init__(self, level, chunk_tiles=STREAM_CHUNK_SIZE, margin=STREAM_MARGIN):
+        self.level = level
+        self.level_data = level.level_data
+        self.chunk_tiles = chunk_tiles
+        self.chunk_size = chunk_tiles * TILE_SIZE
+        self.margin = margin
+        self.chunk_cols = -(-self.level_data.cols // chunk_tiles)
+        self.chunk_rows = -(-self.level_data.rows // chunk_tiles)
+        self.world_rect = pygame.Rect(0, 0, self.chunk_cols * self.chunk_size, self.chunk_rows * self.chunk_size)
+
+        # materialized chunks: chunk -> {tile: cell}, and the chunk of every tile
+        self.loaded = {}
+        self.tile_chunks = {}
+        self.enemies = {}
+        self.area = None
+
+        # state kept while chunks are streamed out
+        self.visited = set()
+        self.destroyed = set()
+        self.parked = {}
+
+        # stats
+        self.load_count = 0
+        self.unload_count = 0
+
+    @property
+    def stats(self):
+        return {
+            'chunks loaded': len(self.loaded), 'tiles': len(self.tile_chunks), 'enemies': len(self.enemies),
+            'loads': self.load_count, 'unloads': self.unload_count
+        }
+
+    def chunk_at(self, pos):
+        return int(pos[0]) // self.chunk_size, int(pos[1]) // self.chunk_size
+
+    def chunks_for(self, rect):
+        # only chunks inside the map
+        rect = rect.clip(self.world_rect)
+        return set(cells_for(rect, self.chunk_size)) if rect else set()
+
+    def chunk_rect(self, chunk):
+        return pygame.Rect(chunk[0] * self.chunk_size, chunk[1] * self.chunk_size, self.chunk_size, self.chunk_size)
+
+    def update(self, center):
+        load_rect = self.level.activity.active_rect.inflate(self.margin * 2, self.margin * 2)
+        load_rect.center = center
+        wanted = self.chunks_for(load_rect)
+        if wanted == self.area:
+            return self
+        self.area = wanted
+
+        # chunks are only released one chunk further out, so they do not flip on the border
+        keep = self.chunks_for(load_rect.inflate(self.chunk_size * 2, self.chunk_size * 2))
+        for enemy in list(self.enemies):
+            if not enemy.alive():
+                del self.enemies[enemy]
+            elif self.chunk_at(enemy.rect.center) not in keep:
+                self.park(enemy)
+        for chunk in [chunk for chunk in self.loaded if chunk not in keep]:
+            self.unload(chunk)
+        for chunk in wanted:
+            if chunk not in self.loaded:
+                self.load(chunk)
+        return self
+
+    def load(self, chunk):
+        col_start, row_start = chunk[0] * self.chunk_tiles, chunk[1] * self.chunk_tiles
+        col_end = min(col_start + self.chunk_tiles, self.level_data.cols)
+        rows = range(row_start, min(row_start + self.chunk_tiles, self.level_data.rows))
+
+        tiles = {}
+        for style, name in self.layers:
+            layout = self.level_data[name]
+            for row_index in rows:
+                for col_index, col in enumerate(layout[row_index][col_start:col_end], col_start):
+                    cell = (style, col_index, row_index)
+                    if col != -1 and cell not in self.destroyed:
+                        tile = self.level.create_tile(style, (col_index * TILE_SIZE, row_index * TILE_SIZE), col)
+                        tiles[tile] = cell
+                        self.tile_chunks[tile] = chunk
+
+        # spawn points are only used the first time, after that enemies come back as they were left
+        if chunk not in self.visited:
+            self.visited.add(chunk)
+            layout = self.level_data['Entities']
+            for row_index in rows:
+                for col_index, col in enumerate(layout[row_index][col_start:col_end], col_start):
+                    if col != -1 and col in self.level.enemy_types:
+                        self.spawn((col_index * TILE_SIZE, row_index * TILE_SIZE), self.level.enemy_types[col])
+        for pos, enemy_type, health in self.parked.pop(chunk, ()):
+            self.spawn(pos, enemy_type).health = health
+
+        self.loaded[chunk] = tiles
+        self.load_count += 1
+        return self
+
+    def unload(self, chunk):
+        for tile in self.loaded.pop(chunk):
+            del self.tile_chunks[tile]
+            self.level.release(tile)
+        self.level.visible_sprites.static_layer.invalidate(self.chunk_rect(chunk))
+        self.unload_count += 1
+        return self
+
+    def spawn(self, pos, enemy_type):
+        enemy = self.level.create_enemy(pos, enemy_type)
+        self.enemies[enemy] = None
+        return enemy
+
+    def park(self, enemy):
+        # live enemies keep their position and health until their chunk comes back
+        del self.enemies[enemy]
+        self.parked.setdefault(self.chunk_at(enemy.rect.center), []).append(
+            (enemy.rect.topleft, enemy.enemy_type, enemy.health))
+        self.level.release(enemy)
+        return self
+
+    def destroy(self, tile):
+        # cut grass stays cut
+        chunk = self.tile_chunks.pop(tile, None)
+        if chunk is not None:
+            self.destroyed.add(self.loaded[chunk].pop(tile))
+        return self
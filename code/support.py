@@ -1,9 +1,19 @@
+import json
+import mmap
 import os
+import struct
+import sys
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from csv import reader
 from os import walk
 
 import pygame
 
+from code.settings import ASSET_CACHE_MAX_BYTES, ASSET_LOADER_WORKERS, ASSET_OPAQUE, ASSET_PACK_PATH, \
+    LEVEL_COMPILED_PATH, LEVEL_CSV_PATH, LEVEL_LAYERS, TEXT_CACHE_SIZE
+
 
 class ImportCsvLayout:
 
@@ -17,13 +27,447 @@ class ImportCsvLayout:
             return terrain_map
 
 
-class ImportFolder:
+def convert_surface(surface, alpha=True):
+    # without a display (headless runs) surfaces stay in their loaded format
+    if pygame.display.get_surface() is None:
+        return surface
+    return surface.convert_alpha() if alpha else surface.convert()
+
+
+class LevelCompiler:
+    magic = b'ZLVL'
+    version = 1
+
+    # magic, version, byte order, layer count, rows, cols
+    header = struct.Struct('<4sHcBII')
+    # layer name and offset of its int16 grid
+    layer_entry = struct.Struct('<16sI')
+
+    @classmethod
+    def is_stale(cls, compiled_path, csv_paths):
+        if not os.path.exists(compiled_path):
+            return True
+        compiled_time = os.path.getmtime(compiled_path)
+        return any(os.path.getmtime(path) > compiled_time for path in csv_paths)
+
+    @classmethod
+    def compile(cls, compiled_path, csv_paths):
+        grids = {name: ImportCsvLayout.load(path) for name, path in csv_paths.items()}
+        rows = max(len(grid) for grid in grids.values())
+        cols = max(len(row) for grid in grids.values() for row in grid)
+
+        offset = cls.header.size + cls.layer_entry.size * len(grids)
+        table, data = [], []
+        for name, grid in grids.items():
+            cells = array('h', [-1] * (rows * cols))
+            for row_index, row in enumerate(grid):
+                for col_index, col in enumerate(row):
+                    cells[row_index * cols + col_index] = int(col)
+            table.append(cls.layer_entry.pack(name.encode(), offset))
+            data.append(cells.tobytes())
+            offset += len(data[-1])
+
+        byte_order = sys.byteorder[0].encode()
+        with open(compiled_path, 'wb') as level_file:
+            level_file.write(cls.header.pack(cls.magic, cls.version, byte_order, len(grids), rows, cols))
+            level_file.writelines(table)
+            level_file.writelines(data)
+
+
+class LevelData:
+    def __init__(self, layers, rows, cols):
+        self.layers = layers
+        self.rows = rows
+        self.cols = cols
+
+    def __getitem__(self, name):
+        return self.layers[name]
+
+    def find(self, name, value):
+        for row_index, row in enumerate(self.layers[name]):
+            if value in row:
+                return row_index, list(row).index(value)
+        return None
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, 'rb') as level_file:
+            buffer = mmap.mmap(level_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, byte_order, layer_count, rows, cols = LevelCompiler.header.unpack_from(buffer)
+        if magic != LevelCompiler.magic or version != LevelCompiler.version or \
+                byte_order != sys.byteorder[0].encode():
+            raise ValueError(f'{path} is not a compiled level for this build')
+
+        # each row is a zero-copy int16 view into the memory-mapped file
+        view = memoryview(buffer)
+        layers = {}
+        for index in range(layer_count):
+            name, offset = LevelCompiler.layer_entry.unpack_from(
+                buffer, LevelCompiler.header.size + index * LevelCompiler.layer_entry.size)
+            cells = view[offset:offset + rows * cols * 2].cast('h')
+            layers[name.rstrip(b'\0').decode()] = [cells[row * cols:(row + 1) * cols] for row in range(rows)]
+        return cls(layers, rows, cols)
+
+
+class ImportLevel:
 
     @staticmethod
-    def load(path):
-        surface_list = []
-        for _, _, img_files in walk(path):
+    def load(compiled_path=LEVEL_COMPILED_PATH, csv_path=LEVEL_CSV_PATH, layers=LEVEL_LAYERS):
+        csv_paths = {name: csv_path.format(name) for name in layers}
+        if LevelCompiler.is_stale(compiled_path, csv_paths.values()):
+            LevelCompiler.compile(compiled_path, csv_paths)
+
+        try:
+            return LevelData.from_file(compiled_path)
+        except ValueError:
+            LevelCompiler.compile(compiled_path, csv_paths)
+            return LevelData.from_file(compiled_path)
+
+
+class SurfacePack:
+    magic = b'ZSRF'
+    version = 1
+
+    # magic, version, length of the json index that follows
+    header = struct.Struct('<4sHI')
+
+    def __init__(self, path):
+        self.path = path
+        self.root = os.path.dirname(os.path.abspath(path))
+        self.buffer = None
+        self.data_start = 0
+        self.opened = False
+
+        # source path -> mtime, size, width, height, pixel format and where the pixels are, new pixels wait in added
+        self.index = {}
+        self.added = {}
+        self.dirty = False
+
+    def key(self, path):
+        return os.path.relpath(os.path.abspath(path), self.root).replace(os.sep, '/')
+
+    def open(self):
+        self.opened = True
+        if not os.path.exists(self.path):
+            return self
+
+        with open(self.path, 'rb') as pack_file:
+            if not os.fstat(pack_file.fileno()).st_size:
+                return self.rebuild()
+            buffer = mmap.mmap(pack_file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, index_size = self.header.unpack_from(buffer)
+            if magic != self.magic or version != self.version:
+                raise ValueError('not a pack of this version')
+            start = self.header.size
+            index = json.loads(bytes(buffer[start:start + index_size]))
+            if not isinstance(index, dict):
+                raise ValueError('no index')
+        except (struct.error, ValueError):
+            # an old, foreign or damaged file is simply rebuilt
+            buffer.close()
+            return self.rebuild()
+
+        self.index = index
+        self.data_start = start + index_size
+        self.buffer = buffer
+        return self
+
+    def rebuild(self):
+        self.index = {}
+        self.dirty = True
+        return self
+
+    def close(self):
+        if self.buffer is not None:
+            self.buffer.close()
+            self.buffer = None
+        return self
+
+    def fresh(self, path):
+        if not self.opened:
+            self.open()
+
+        # an entry is only used while its source file is unchanged
+        entry = self.index.get(self.key(path))
+        if entry is None:
+            return None
+        stat = os.stat(path)
+        if entry['mtime'] != stat.st_mtime_ns or entry['size'] != stat.st_size:
+            return None
+        return entry
+
+    def pixels(self, key, entry):
+        pixels = self.added.get(key)
+        if pixels is None and self.buffer is not None:
+            start = self.data_start + entry['offset']
+            pixels = memoryview(self.buffer)[start:start + entry['length']]
+
+        # a file cut short leaves entries without their pixels, those are missing rather than fatal
+        expected = entry['width'] * entry['height'] * len(entry.get('format', 'RGBA'))
+        if pixels is None or len(pixels) != entry['length'] or entry['length'] != expected:
+            return None
+        return pixels
+
+    def get(self, path, alpha=True):
+        entry = self.fresh(path)
+        if entry is None:
+            return None
+
+        pixels = self.pixels(self.key(path), entry)
+        if pixels is None:
+            return None
+        try:
+            surface = pygame.image.frombuffer(pixels, (entry['width'], entry['height']), entry.get('format', 'RGBA'))
+        except ValueError:
+            return None
+
+        # the surface must not keep pointing into the mapped file
+        converted = convert_surface(surface, alpha)
+        return surface.copy() if converted is surface else converted
+
+    def put(self, path, surface):
+        if not self.opened:
+            self.open()
+
+        # opaque surfaces are stored without the alpha channel
+        stat = os.stat(path)
+        key = self.key(path)
+        pixel_format = 'RGBA' if surface.get_flags() & pygame.SRCALPHA else 'RGB'
+        self.added[key] = pygame.image.tobytes(surface, pixel_format)
+        self.index[key] = {
+            'mtime': stat.st_mtime_ns, 'size': stat.st_size, 'width': surface.get_width(),
+            'height': surface.get_height(), 'format': pixel_format, 'offset': 0, 'length': len(self.added[key])
+        }
+        self.dirty = True
+        return self
+
+    def save(self):
+        if not self.dirty:
+            return self
+
+        # every entry is written again, the ones from the old file are copied out of the map first
+        chunks, offset = [], 0
+        for key, entry in list(self.index.items()):
+            pixels = self.pixels(key, entry)
+            if pixels is None:
+                del self.index[key]
+                continue
+            chunks.append(bytes(pixels))
+            entry['offset'] = offset
+            offset += len(pixels)
+
+        # the map can only be closed once no view points into it
+        pixels = None
+        self.close()
+
+        # the new file only replaces the old one once it is complete, so a crash or a second process
+        # saving at the same time never leaves a half written pack behind
+        index = json.dumps(self.index).encode()
+        temp_path = f'{self.path}.{os.getpid()}.tmp'
+        with open(temp_path, 'wb') as pack_file:
+            pack_file.write(self.header.pack(self.magic, self.version, len(index)))
+            pack_file.write(index)
+            pack_file.writelines(chunks)
+        os.replace(temp_path, self.path)
+
+        self.added.clear()
+        self.dirty = False
+        return self.open()
+
+
+class AssetCache:
+    def __init__(self, max_bytes=None, pack=None, opaque=()):
+        self.max_bytes = max_bytes
+        self.pack = pack
+        self.opaque = {self.normalize(path) for path in opaque}
+        self.surfaces = OrderedDict()
+        self.sizes = {}
+        self.folders = {}
+        self.total_bytes = 0
+
+        # stats
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def normalize(path):
+        return os.path.normcase(os.path.abspath(path))
+
+    @classmethod
+    def key(cls, path, flip_x=False, flip_y=False, alpha=None):
+        return cls.normalize(path), flip_x, flip_y, alpha
+
+    @property
+    def stats(self):
+        return {
+            'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+            'entries': len(self.surfaces), 'bytes': self.total_bytes
+        }
+
+    def image(self, path, flip_x=False, flip_y=False, alpha=None):
+        key = self.key(path, flip_x, flip_y, alpha)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        if alpha is not None:
+            # faded variants are baked once, so the shared frames are never changed in place
+            surface = self.image(path, flip_x, flip_y).copy()
+            surface.set_alpha(alpha)
+        elif flip_x or flip_y:
+            surface = pygame.transform.flip(self.image(path), flip_x, flip_y)
+        else:
+            surface = self.load(path)
+        self.store(key, surface)
+        return surface
+
+    def load(self, path, decoded=None):
+        # pixels come from the pack while it has a fresh copy, otherwise the png is decoded and packed
+        alpha = self.normalize(path) not in self.opaque
+        surface = self.pack.get(path, alpha) if self.pack and decoded is None else None
+        if surface is None:
+            surface = convert_surface(decoded or pygame.image.load(path), alpha)
+            if self.pack:
+                self.pack.put(path, surface)
+        return surface
+
+    def save_pack(self):
+        if self.pack:
+            self.pack.save()
+        return self
+
+    def folder(self, path, flip_x=False, flip_y=False, alpha=None):
+        key = self.normalize(path)
+        if key not in self.folders:
+            self.folders[key] = [
+                os.path.normpath(os.path.join(path, image))
+                for _, _, img_files in walk(path) for image in img_files
+            ]
+        return [self.image(full_path, flip_x, flip_y, alpha) for full_path in self.folders[key]]
+
+    def store(self, key, surface):
+        # a surface stored again under the same key replaces the old one, and its size
+        size = surface.get_bytesize() * surface.get_width() * surface.get_height()
+        self.total_bytes += size - self.sizes.get(key, 0)
+        self.surfaces[key] = surface
+        self.surfaces.move_to_end(key)
+        self.sizes[key] = size
+
+        # least recently used surfaces go first, the new one always stays
+        if self.max_bytes is not None:
+            while self.total_bytes > self.max_bytes and len(self.surfaces) > 1:
+                old_key, _ = self.surfaces.popitem(last=False)
+                self.total_bytes -= self.sizes.pop(old_key)
+                self.evictions += 1
+
+    def clear(self):
+        self.surfaces.clear()
+        self.sizes.clear()
+        self.folders.clear()
+        self.total_bytes = 0
+
+
+assets = AssetCache(ASSET_CACHE_MAX_BYTES, SurfacePack(ASSET_PACK_PATH) if ASSET_PACK_PATH else None, ASSET_OPAQUE)
+
+
+class AssetLoader:
+    def __init__(self, cache=assets, workers=ASSET_LOADER_WORKERS):
+        self.cache = cache
+        self.workers = workers
+
+        # path -> priority, the lowest priority is loaded first
+        self.requests = {}
+        self.total = 0
+        self.done = 0
+
+    @property
+    def progress(self):
+        return self.done / self.total if self.total else 1.0
+
+    def add(self, path, priority=0):
+        if self.cache.key(path) not in self.cache.surfaces:
+            self.requests[path] = min(priority, self.requests.get(path, priority))
+        return self
+
+    def add_tree(self, path, priority=0):
+        if os.path.isfile(path):
+            return self.add(path, priority)
+        for root, _, img_files in walk(path):
             for image in img_files:
-                full_path = os.path.normpath(os.path.join(path, image))
-                surface_list.append(pygame.image.load(full_path).convert_alpha())
-        return surface_list
+                if image.endswith('.png'):
+                    self.add(os.path.normpath(os.path.join(root, image)), priority)
+        return self
+
+    def load(self, on_progress=None):
+        paths = sorted(self.requests, key=lambda request: self.requests[request])
+        self.requests.clear()
+        self.total, self.done = len(paths), 0
+
+        # files missing from the pack are read and decoded on the pool, surfaces are converted on the main thread
+        pack = self.cache.pack
+        with ThreadPoolExecutor(self.workers) as pool:
+            decoding = {
+                path: pool.submit(pygame.image.load, path) for path in paths if not (pack and pack.fresh(path))
+            }
+            for path in paths:
+                decoded = decoding[path].result() if path in decoding else None
+                self.cache.store(self.cache.key(path), self.cache.load(path, decoded))
+                self.done += 1
+                if on_progress:
+                    on_progress(self.progress)
+        self.cache.save_pack()
+        return self
+
+
+class TextCache:
+    def __init__(self, max_entries=TEXT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.surfaces = OrderedDict()
+
+        # stats
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+            'entries': len(self.surfaces), 'hit_rate': self.hits / lookups if lookups else 0.0
+        }
+
+    def render(self, font, text, antialias, color):
+        key = (font, text, antialias, color)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+            self.evictions += 1
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
+
+
+text_cache = TextCache(TEXT_CACHE_SIZE)
+
+
+class ImportFolder:
+
+    @staticmethod
+    def load(path, flip_x=False, flip_y=False, alpha=None):
+        return assets.folder(path, flip_x, flip_y, alpha)
@@ -2,14 +2,18 @@
 
 import pygame
 
+from code.controls import keyboard
+from code.game_clock import game_clock
+from code.support import convert_surface, text_cache
 from settings import *
 
 
 class Upgrade:
-    def __init__(self, player):
+    def __init__(self, player, display_surface=None, input_source=keyboard):
 
         # general setup
-        self.display_surface = pygame.display.get_surface()
+        self.display_surface = display_surface or pygame.display.get_surface()
+        self.input_source = input_source
         self.player = player
         self.attribute_nr = len(player.stats)
         self.attribute_names = list(player.stats.keys())
@@ -28,26 +32,26 @@ class Upgrade:
         self.can_move = True
 
     def input(self):
-        keys = pygame.key.get_pressed()
+        keys = self.input_source.get_pressed()
 
         if self.can_move:
             if keys[pygame.K_RIGHT] and self.selection_index < self.attribute_nr - 1:
                 self.selection_index += 1
                 self.can_move = False
-                self.selection_time = pygame.time.get_ticks()
+                self.selection_time = game_clock.get_ticks()
             elif keys[pygame.K_LEFT] and self.selection_index >= 1:
                 self.selection_index -= 1
                 self.can_move = False
-                self.selection_time = pygame.time.get_ticks()
+                self.selection_time = game_clock.get_ticks()
 
             if keys[pygame.K_SPACE]:
                 self.can_move = False
-                self.selection_time = pygame.time.get_ticks()
+                self.selection_time = game_clock.get_ticks()
                 self.item_list[self.selection_index].trigger(self.player)
 
     def selection_cooldown(self):
         if not self.can_move:
-            current_time = pygame.time.get_ticks()
+            current_time = game_clock.get_ticks()
             if current_time - self.selection_time >= 300:
                 self.can_move = True
 
@@ -66,17 +70,20 @@ class Upgrade:
             # create the object
             self.item_list.append(Item(left, top, self.width, self.height, index, self.font))
 
-    def display(self):
+    def update(self):
         self.input()
         self.selection_cooldown()
 
+    def display(self):
+        panels = []
         for index, item in enumerate(self.item_list):
             # get attributes
             name = self.attribute_names[index]
             value = self.player.get_value_by_index(index)
             max_value = self.max_values[index]
             cost = self.player.get_cost_by_index(index)
-            item.display(self.display_surface, self.selection_index, name, value, max_value, cost)
+            panels.append((item.panel(self.selection_index, name, value, max_value, cost), item.rect))
+        self.display_surface.blits(panels, False)
 
 
 class Item:
@@ -85,26 +92,30 @@ class Item:
         self.index = index
         self.font = font
 
-    def display_names(self, surface, name, cost, selected):
+        # selected / unselected panels, rendered again only after an upgrade
+        self.panels = {}
+
+    def display_names(self, surface, rect, name, cost, selected):
         color = TEXT_COLOR_SELECTED if selected else TEXT_COLOR
 
         # title
-        title_surf = self.font.render(name, False, color)
-        title_rect = title_surf.get_rect(midtop=self.rect.midtop + pygame.math.Vector2(0, 20))
+        title_surf = text_cache.render(self.font, name, False, color)
+        title_rect = title_surf.get_rect(midtop=rect.midtop + pygame.math.Vector2(0, 20))
 
         # cost
-        cost_surf = self.font.render(f'{int(cost)}', False, color)
-        cost_rect = cost_surf.get_rect(midbottom=self.rect.midbottom - pygame.math.Vector2(0, 20))
+        cost_surf = text_cache.render(self.font, f'{int(cost)}', False, color)
+        cost_rect = cost_surf.get_rect(midbottom=rect.midbottom - pygame.math.Vector2(0, 20))
 
         # draw
         surface.blit(title_surf, title_rect)
         surface.blit(cost_surf, cost_rect)
 
-    def display_bar(self, surface, value, max_value, selected):
+    @staticmethod
+    def display_bar(surface, rect, value, max_value, selected):
 
         # drawing setup
-        top = self.rect.midtop + pygame.math.Vector2(0, 60)
-        bottom = self.rect.midbottom - pygame.math.Vector2(0, 60)
+        top = rect.midtop + pygame.math.Vector2(0, 60)
+        bottom = rect.midbottom - pygame.math.Vector2(0, 60)
         color = BAR_COLOR_SELECTED if selected else BAR_COLOR
 
         # bar setup
@@ -128,13 +139,26 @@ class Item:
         if player.stats[upgrade_attribute] > player.max_stats[upgrade_attribute]:
             player.stats[upgrade_attribute] = player.max_stats[upgrade_attribute]
 
-    def display(self, surface, selection_num, name, value, max_value, cost):
-        if self.index == selection_num:
-            pygame.draw.rect(surface, UPGRADE_BG_COLOR_SELECTED, self.rect)
-            pygame.draw.rect(surface, UI_BORDER_COLOR, self.rect, 4)
-        else:
-            pygame.draw.rect(surface, UI_BG_COLOR, self.rect)
-            pygame.draw.rect(surface, UI_BORDER_COLOR, self.rect, 4)
+        # value and cost may have changed
+        self.panels.clear()
 
-        self.display_names(surface, name, cost, self.index == selection_num)
-        self.display_bar(surface, value, max_value, self.index == selection_num)
+    def render(self, selected, name, value, max_value, cost):
+        panel = convert_surface(pygame.Surface(self.rect.size), alpha=False)
+        rect = panel.get_rect()
+        if selected:
+            pygame.draw.rect(panel, UPGRADE_BG_COLOR_SELECTED, rect)
+            pygame.draw.rect(panel, UI_BORDER_COLOR, rect, 4)
+        else:
+            pygame.draw.rect(panel, UI_BG_COLOR, rect)
+            pygame.draw.rect(panel, UI_BORDER_COLOR, rect, 4)
+
+        self.display_names(panel, rect, name, cost, selected)
+        self.display_bar(panel, rect, value, max_value, selected)
+        return panel
+
+    def panel(self, selection_num, name, value, max_value, cost):
+        selected = self.index == selection_num
+        panel = self.panels.get(selected)
+        if panel is None:
+            panel = self.panels[selected] = self.render(selected, name, value, max_value, cost)
+        return panel
@@ -1,22 +1,44 @@
 import pygame
 
+from code.settings import weapon_data
+from code.support import assets
+
+
+class WeaponGraphics:
+    # weapon anchor, player anchor and offset for each direction
+    placements = {
+        'right': ('midleft', 'midright', (0, 16)),
+        'left': ('midright', 'midleft', (0, 16)),
+        'down': ('midtop', 'midbottom', (-10, 0)),
+        'up': ('midbottom', 'midtop', (-10, 0)),
+    }
+
+    def __init__(self):
+        self.surfaces = {
+            (weapon, direction): assets.image(f'../graphics/weapons/{weapon}/{direction}.png')
+            for weapon in weapon_data.keys()
+            for direction in self.placements.keys()
+        }
+
+    def get(self, weapon, direction):
+        return self.surfaces[(weapon, direction)], self.placements[direction]
+
 
 class Weapon(pygame.sprite.Sprite):
-    def __init__(self, player, groups):
-        super().__init__(*groups)
-        direction = player.status.value.split('_')[0]
+    def __init__(self, graphics):
+        super().__init__()
+        self.graphics = graphics
+        self.sprite_type = "weapon"
+        self.image = None
+        self.rect = None
+
+    def reset(self, player):
+        direction = player.status.direction
 
         # graphic
-        full_path = f'../graphics/weapons/{player.weapon}/{direction}.png'
-        self.image = pygame.image.load(full_path).convert_alpha()
-        self.sprite_type = "weapon"
+        self.image, (anchor, player_anchor, offset) = self.graphics.get(player.weapon, direction)
 
         # placement
-        if direction == 'right':
-            self.rect = self.image.get_rect(midleft=player.rect.midright + pygame.math.Vector2(0, 16))
-        elif direction == 'left':
-            self.rect = self.image.get_rect(midright=player.rect.midleft + pygame.math.Vector2(0, 16))
-        elif direction == 'down':
-            self.rect = self.image.get_rect(midtop=player.rect.midbottom + pygame.math.Vector2(-10, 0))
-        else:
-            self.rect = self.image.get_rect(midbottom=player.rect.midtop + pygame.math.Vector2(-10, 0))
+        x, y = getattr(player.rect, player_anchor)
+        self.rect = self.image.get_rect(**{anchor: (x + offset[0], y + offset[1])})
+        return self